@@ -0,0 +1,430 @@
+# analytics.py
+# Aggregates over the choice event log (see eventlog.py):
+#   - win rate by round
+#   - attempts a player needed to first reach --wins wins
+#   - impossible mode (5+ wins, no correct door): plays and players
+#   - time between a player's consecutive choices
+#
+#   python analytics.py --dir instance/events
+#   python analytics.py --last 6h --json
+#   python analytics.py --since 2024-05-01T00:00 --until 2024-05-02T00:00
+#
+# Every segment is memory-mapped and the selected time window is processed in
+# time slices of about --chunk records, merged across segments (each serve.py
+# worker writes its own) and sorted by time. Only one slice is in memory at a
+# time, so the log can be larger than RAM. With NumPy installed each slice is
+# a structured array and the aggregates are vectorized; without it the same
+# numbers come from stdlib arrays and plain loops, much more slowly.
+import argparse
+import json
+import math
+import os
+import re
+import struct
+import sys
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from operator import itemgetter
+
+from eventlog import FIELDS, NUMPY_DTYPE, RECORD, RECORD_SIZE, list_segments, open_segment
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+MAX_ROUND = 10
+# Histogram for the time between choices: log-spaced upper edges, 10 ms to about a day.
+GAP_EDGES = tuple(0.01 * 10 ** (i / 20) for i in range(140))
+# Buckets for attempts-to-N-wins, inclusive.
+ATTEMPT_BUCKETS = ((1, 1), (2, 2), (3, 3), (4, 5), (6, 10), (11, 20), (21, 50), (51, 100), (101, None))
+# Column type codes for the stdlib fallback, in FIELDS order.
+_TYPECODES = ("Q", "Q", "L", "B", "B", "B", "B")
+_TS = struct.Struct("<Q")
+
+
+# =========================
+# Reading
+# =========================
+class _TsColumn:
+    # Lazy, bisectable view of a segment's timestamps for the stdlib path.
+    def __init__(self, mm):
+        self.mm = mm
+
+    def __len__(self):
+        return len(self.mm) // RECORD_SIZE
+
+    def __getitem__(self, i):
+        return _TS.unpack_from(self.mm, i * RECORD_SIZE)[0]
+
+
+class Segment:
+    # Records are appended in time order, so the timestamp column is sorted
+    # and a time range maps to a record range by binary search.
+    def __init__(self, mm, use_numpy):
+        self.mm = mm
+        if use_numpy:
+            self.records = np.frombuffer(mm, dtype=NUMPY_DTYPE)
+            self.ts = self.records["ts"]
+        else:
+            self.records = None
+            self.ts = _TsColumn(mm)
+
+    def range(self, start, end):
+        if self.records is not None:
+            # uint64 keys explicitly: a mixed tuple would become float64 and lose nanoseconds
+            bounds = np.array((start, end), dtype=np.uint64)
+            return tuple(int(i) for i in np.searchsorted(self.ts, bounds))
+        return bisect_left(self.ts, start), bisect_left(self.ts, end)
+
+
+def open_segments(directory, use_numpy):
+    segments = []
+    for path in list_segments(directory):
+        mm = open_segment(path)
+        if mm is not None:
+            segments.append(Segment(mm, use_numpy))
+    return segments
+
+
+def time_slices(segments, start, end, chunk):
+    # Split [start, end) into time slices of about chunk records each, counted
+    # across all segments, so a burst of traffic can't make one slice hold
+    # most of the window. Each bound is found by binary search on time (a
+    # slice only runs over chunk when records share a timestamp).
+    ranges = [seg.range(start, end) for seg in segments]
+    total = sum(hi - lo for lo, hi in ranges)
+    if not total:
+        return []
+    first = min(seg.ts[lo] for seg, (lo, hi) in zip(segments, ranges) if hi > lo)
+    last = max(seg.ts[hi - 1] for seg, (lo, hi) in zip(segments, ranges) if hi > lo) + 1
+    n = max(1, math.ceil(total / chunk))
+    first, last = int(first), int(last)
+
+    def before(t):
+        # records in [first, t)
+        return sum(seg.range(first, t)[1] - lo for seg, (lo, _) in zip(segments, ranges))
+
+    bounds = [first]
+    for i in range(1, n):
+        target = -(-total * i // n)
+        if before(bounds[-1]) >= target:
+            continue  # reached already, past a run of equal timestamps
+        lo, hi = bounds[-1] + 1, last
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if before(mid) >= target:
+                hi = mid
+            else:
+                lo = mid + 1
+        if lo < last:
+            bounds.append(lo)
+    bounds.append(last)
+    return list(zip(bounds, bounds[1:]))
+
+
+def load_slice_numpy(segments, start, end):
+    parts = []
+    for seg in segments:
+        lo, hi = seg.range(start, end)
+        if hi > lo:
+            parts.append(seg.records[lo:hi])
+    if not parts:
+        return None
+    rec = np.concatenate(parts)
+    return rec[np.argsort(rec["ts"], kind="stable")]
+
+
+def load_slice_arrays(segments, start, end):
+    rows = []
+    for seg in segments:
+        lo, hi = seg.range(start, end)
+        if hi > lo:
+            rows.extend(RECORD.iter_unpack(seg.mm[lo * RECORD_SIZE:hi * RECORD_SIZE]))
+    if not rows:
+        return None
+    rows.sort(key=itemgetter(0))
+    return {name: array(code, column) for name, code, column in zip(FIELDS, _TYPECODES, zip(*rows))}
+
+
+# =========================
+# Aggregates
+# =========================
+# Both backends are fed slices in time order and return the same raw
+# totals, which summarize() turns into the report.
+class NumpyAggregates:
+    def __init__(self, wins_target):
+        self.wins_target = wins_target
+        self.records = 0
+        self.first_ts = self.last_ts = None
+        self.plays = np.zeros(MAX_ROUND + 1, np.int64)
+        self.wins = np.zeros(MAX_ROUND + 1, np.int64)
+        self.players = np.empty(0, np.uint64)
+        self.impossible_plays = 0
+        self.impossible_players = np.empty(0, np.uint64)
+        self.reached = {}  # player -> attempts taken when first reaching wins_target
+        # Last choice time per player seen so far, sorted by player.
+        self.carry_players = np.empty(0, np.uint64)
+        self.carry_ts = np.empty(0, np.uint64)
+        self.gap_edges = np.array(GAP_EDGES)
+        self.gap_hist = np.zeros(len(GAP_EDGES) + 1, np.int64)
+        self.gap_ns = 0
+
+    def update(self, rec):
+        ts, player, attempt = rec["ts"], rec["player"], rec["attempt"]
+        rnd, correct, won = rec["round"], rec["correct"], rec["outcome"].astype(bool)
+        self.records += len(rec)
+        self.first_ts = int(ts[0]) if self.first_ts is None else self.first_ts
+        self.last_ts = int(ts[-1])
+
+        self.plays += np.bincount(rnd, minlength=MAX_ROUND + 1)[:MAX_ROUND + 1]
+        self.wins += np.bincount(rnd[won], minlength=MAX_ROUND + 1)[:MAX_ROUND + 1]
+        self.players = np.union1d(self.players, player)
+
+        impossible = correct == 0
+        self.impossible_plays += int(impossible.sum())
+        self.impossible_players = np.union1d(self.impossible_players, player[impossible])
+
+        hit = won & (rnd == self.wins_target)
+        if hit.any():
+            # rec is in time order, so the first index per player is their first time.
+            hit_players, first = np.unique(player[hit], return_index=True)
+            for p, a in zip(hit_players.tolist(), attempt[hit][first].tolist()):
+                self.reached.setdefault(p, a + 1)
+
+        self._gaps(player, ts)
+
+    def _gaps(self, player, ts):
+        order = np.lexsort((ts, player))
+        p, t = player[order], ts[order]
+        same = p[1:] == p[:-1]
+        gaps = [(t[1:] - t[:-1])[same]]
+
+        # Each player's first choice in this slice follows their last one in earlier slices.
+        starts = np.flatnonzero(np.concatenate(([True], ~same)))
+        ends = np.concatenate((starts[1:] - 1, [len(p) - 1]))
+        if len(self.carry_players):
+            idx = np.minimum(np.searchsorted(self.carry_players, p[starts]), len(self.carry_players) - 1)
+            found = self.carry_players[idx] == p[starts]
+            gaps.append(t[starts][found] - self.carry_ts[idx][found])
+
+        gaps = np.concatenate(gaps)
+        self.gap_hist += np.bincount(np.searchsorted(self.gap_edges, gaps / 1e9), minlength=len(GAP_EDGES) + 1)
+        self.gap_ns += int(gaps.sum())
+
+        keep = ~np.isin(self.carry_players, p[ends])
+        carry_players = np.concatenate((self.carry_players[keep], p[ends]))
+        carry_ts = np.concatenate((self.carry_ts[keep], t[ends]))
+        order = np.argsort(carry_players, kind="stable")
+        self.carry_players, self.carry_ts = carry_players[order], carry_ts[order]
+
+    def raw(self):
+        return dict(
+            records=self.records, first_ts=self.first_ts, last_ts=self.last_ts,
+            plays=self.plays.tolist(), wins=self.wins.tolist(), players=len(self.players),
+            impossible_plays=self.impossible_plays, impossible_players=len(self.impossible_players),
+            reached=list(self.reached.values()), gap_hist=self.gap_hist.tolist(), gap_ns=self.gap_ns,
+        )
+
+
+class ArrayAggregates:
+    def __init__(self, wins_target):
+        self.wins_target = wins_target
+        self.records = 0
+        self.first_ts = self.last_ts = None
+        self.plays = [0] * (MAX_ROUND + 1)
+        self.wins = [0] * (MAX_ROUND + 1)
+        self.players = set()
+        self.impossible_plays = 0
+        self.impossible_players = set()
+        self.reached = {}
+        self.last_seen = {}
+        self.gap_hist = [0] * (len(GAP_EDGES) + 1)
+        self.gap_ns = 0
+
+    def update(self, cols):
+        ts = cols["ts"]
+        self.records += len(ts)
+        self.first_ts = ts[0] if self.first_ts is None else self.first_ts
+        self.last_ts = ts[-1]
+        last_seen, reached, target = self.last_seen, self.reached, self.wins_target
+        for t, p, a, r, c, w in zip(ts, cols["player"], cols["attempt"], cols["round"], cols["correct"], cols["outcome"]):
+            if r <= MAX_ROUND:
+                self.plays[r] += 1
+                if w:
+                    self.wins[r] += 1
+            self.players.add(p)
+            if not c:
+                self.impossible_plays += 1
+                self.impossible_players.add(p)
+            if w and r == target and p not in reached:
+                reached[p] = a + 1
+            prev = last_seen.get(p)
+            if prev is not None:
+                self.gap_hist[bisect_left(GAP_EDGES, (t - prev) / 1e9)] += 1
+                self.gap_ns += t - prev
+            last_seen[p] = t
+
+    def raw(self):
+        return dict(
+            records=self.records, first_ts=self.first_ts, last_ts=self.last_ts,
+            plays=self.plays, wins=self.wins, players=len(self.players),
+            impossible_plays=self.impossible_plays, impossible_players=len(self.impossible_players),
+            reached=list(self.reached.values()), gap_hist=self.gap_hist, gap_ns=self.gap_ns,
+        )
+
+
+def analyze(directory, start=0, end=2 ** 64 - 1, wins_target=5, chunk=1_000_000, use_numpy=None):
+    if use_numpy is None:
+        use_numpy = np is not None
+    segments = open_segments(directory, use_numpy)
+    agg = NumpyAggregates(wins_target) if use_numpy else ArrayAggregates(wins_target)
+    load = load_slice_numpy if use_numpy else load_slice_arrays
+    for lo, hi in time_slices(segments, start, end, chunk):
+        data = load(segments, lo, hi)
+        if data is not None:
+            agg.update(data)
+    return summarize(agg.raw(), wins_target)
+
+
+def _hist_percentile(hist, total, pct):
+    # Upper edge of the bucket holding the pct-th percentile.
+    target = total * pct / 100.0
+    cumulative = 0
+    for i, count in enumerate(hist):
+        cumulative += count
+        if cumulative >= target and count:
+            return GAP_EDGES[i] if i < len(GAP_EDGES) else math.inf
+    return None
+
+
+def summarize(raw, wins_target):
+    rounds = []
+    for r in range(1, MAX_ROUND + 1):
+        plays, wins = raw["plays"][r], raw["wins"][r]
+        rounds.append({"round": r, "plays": plays, "wins": wins, "win_rate": wins / plays if plays else None})
+
+    reached = sorted(raw["reached"])
+    distribution = []
+    for lo, hi in ATTEMPT_BUCKETS:
+        i, j = bisect_left(reached, lo), bisect_right(reached, hi) if hi is not None else len(reached)
+        label = "%d" % lo if lo == hi else "%d-%d" % (lo, hi) if hi is not None else "%d+" % lo
+        distribution.append({"attempts": label, "players": j - i})
+
+    gap_count = sum(raw["gap_hist"])
+    return {
+        "records": raw["records"],
+        "players": raw["players"],
+        "first": raw["first_ts"],
+        "last": raw["last_ts"],
+        "rounds": rounds,
+        "attempts_to_wins": {
+            "wins": wins_target,
+            "players": len(reached),
+            "mean": sum(reached) / len(reached) if reached else None,
+            "median": reached[len(reached) // 2] if reached else None,
+            "distribution": distribution,
+        },
+        "impossible_mode": {
+            "plays": raw["impossible_plays"],
+            "players": raw["impossible_players"],
+            "share_of_players": raw["impossible_players"] / raw["players"] if raw["players"] else None,
+        },
+        "time_between_choices": {
+            "count": gap_count,
+            "mean_s": raw["gap_ns"] / gap_count / 1e9 if gap_count else None,
+            "p50_s": _hist_percentile(raw["gap_hist"], gap_count, 50),
+            "p90_s": _hist_percentile(raw["gap_hist"], gap_count, 90),
+            "p99_s": _hist_percentile(raw["gap_hist"], gap_count, 99),
+        },
+    }
+
+
+# =========================
+# CLI
+# =========================
+_DURATION = re.compile(r"^(\d+(?:\.\d+)?)([smhd])$")
+_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_time(value):
+    # Unix seconds or ISO 8601 (local time unless it carries an offset) -> ns
+    try:
+        return int(float(value) * 1e9)
+    except ValueError:
+        return int(datetime.fromisoformat(value).timestamp() * 1e9)
+
+
+def parse_duration(value):
+    m = _DURATION.match(value)
+    if not m:
+        raise argparse.ArgumentTypeError("expected a duration like 30m, 6h or 2d")
+    return float(m.group(1)) * _UNITS[m.group(2)]
+
+
+def _fmt_ts(ns):
+    return datetime.fromtimestamp(ns / 1e9).isoformat(sep=" ", timespec="seconds") if ns is not None else "-"
+
+
+def _fmt(value, spec):
+    return "-" if value is None else spec % value
+
+
+def print_report(report):
+    print("records %d, players %d, %s .. %s" % (report["records"], report["players"], _fmt_ts(report["first"]), _fmt_ts(report["last"])))
+
+    print("\nWin rate by round")
+    print("%6s %10s %10s %9s" % ("round", "plays", "wins", "win %"))
+    for r in report["rounds"]:
+        print("%6d %10d %10d %9s" % (r["round"], r["plays"], r["wins"], _fmt(r["win_rate"] and r["win_rate"] * 100, "%.2f")))
+
+    a = report["attempts_to_wins"]
+    print("\nAttempts to first reach %d wins: %d players, mean %s, median %s" % (
+        a["wins"], a["players"], _fmt(a["mean"], "%.2f"), _fmt(a["median"], "%d")))
+    for bucket in a["distribution"]:
+        print("%10s %10d" % (bucket["attempts"], bucket["players"]))
+
+    i = report["impossible_mode"]
+    print("\nImpossible mode: %d plays, %d players (%s of players)" % (
+        i["plays"], i["players"], _fmt(i["share_of_players"] and i["share_of_players"] * 100, "%.2f%%")))
+
+    g = report["time_between_choices"]
+    print("\nTime between a player's choices: %d gaps, mean %s s, p50 <= %s s, p90 <= %s s, p99 <= %s s" % (
+        g["count"], _fmt(g["mean_s"], "%.3f"), _fmt(g["p50_s"], "%.3g"), _fmt(g["p90_s"], "%.3g"), _fmt(g["p99_s"], "%.3g")))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Aggregate the Life or Death choice event log.")
+    parser.add_argument("--dir", default=os.path.join("instance", "events"), help="event log directory (EVENT_LOG_DIR)")
+    parser.add_argument("--since", type=parse_time, help="start of the window: unix seconds or ISO 8601")
+    parser.add_argument("--until", type=parse_time, help="end of the window (exclusive)")
+    parser.add_argument("--last", type=parse_duration, help="window ending now, e.g. 30m, 6h, 2d")
+    parser.add_argument("--wins", type=int, default=5, help="win count for the attempts distribution (default 5, impossible mode)")
+    parser.add_argument("--chunk", type=int, default=1_000_000, help="records per time slice held in memory")
+    parser.add_argument("--backend", choices=("auto", "numpy", "array"), default="auto")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    if args.backend == "numpy" and np is None:
+        parser.error("NumPy is not installed")
+    start = args.since or 0
+    if args.last:
+        start = max(start, time.time_ns() - int(args.last * 1e9))
+    end = args.until or 2 ** 64 - 1
+
+    t0 = time.perf_counter()
+    report = analyze(args.dir, start, end, args.wins, args.chunk,
+                     use_numpy=None if args.backend == "auto" else args.backend == "numpy")
+    elapsed = time.perf_counter() - t0
+    if args.json:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        print_report(report)
+        print("\n%.2fs (%s)" % (elapsed, "numpy" if (args.backend == "numpy" or (args.backend == "auto" and np)) else "array"))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,35 +1,278 @@
 # app.py
-from flask import Flask, session, request, redirect, url_for, render_template_string, jsonify, make_response
-import random
+from flask import Flask, Response, session, request, redirect, url_for, render_template, jsonify, make_response, abort, stream_with_context, after_this_request
+from jinja2 import DictLoader, FileSystemBytecodeCache
+from compression import StaticBody, compress_response, negotiate
+from doors import create_source, draw_schedule, scheduled_door
+from eventlog import EventLog
+from fonts import FONT_FACES, available_faces
+from gamestate import GameState
+from health import HealthMiddleware
+from leaderboard import Leaderboard, player_label, start_snapshotter
+from metrics import MetricsMiddleware, Registry
+from minify import MINIFIERS, minify_html
+from ratelimit import BucketTable, RateLimitMiddleware
+from sessions import ServerSideSessionInterface, create_store, start_sweeper
+from spectate import Broadcaster
+import atexit
+import hashlib
+import mimetypes
+import os
+import threading
+from collections import OrderedDict
 from datetime import timedelta
 import time
 
-app = Flask(__name__)
+# Cold-start cost by phase, in order: [(phase, seconds)]. serve.py prints it;
+# see also bench.cold_start.
+startup_timings = []
+_startup_mark = time.perf_counter()
+
+def startup_phase(name):
+    global _startup_mark
+    now = time.perf_counter()
+    startup_timings.append((name, now - _startup_mark))
+    _startup_mark = now
+
+# Static files are served only through fingerprinted URLs (see asset_url)
+app = Flask(__name__, static_folder=None)
 app.secret_key = "change-me-please"  # replace in production
 app.permanent_session_lifetime = timedelta(hours=2)
 
+# Defaults; override with LOD_* environment variables (e.g. LOD_TEMPLATE_CACHE_DIR=/tmp/lod-jinja)
+app.config.update(
+    TEMPLATE_CACHE_DIR=None,  # on-disk Jinja bytecode cache, off by default
+    WARMUP=True,  # run the first-request code paths at startup (see warm_up)
+    MINIFY=True,  # strip comments and indentation from the page templates and static assets at startup
+    STATIC_DIR=os.path.join(app.root_path, "static"),
+    ASSET_MAX_AGE=365 * 24 * 3600,  # fingerprinted assets never change under the same URL
+    COMPRESS_MIN_SIZE=1024,  # smaller dynamic bodies (beacons, /state) go out uncompressed
+    COMPRESS_LEVEL=6,  # zlib level for dynamic bodies; static bodies are precompressed at 9
+    SESSION_BACKEND="cookie",  # "cookie" (signed cookie), "memory" (in-process LRU) or "sqlite"
+    SESSION_MAX_ENTRIES=100_000,  # memory backend: least recently used sessions are evicted past this
+    SESSION_DB_PATH=os.path.join(app.instance_path, "sessions.db"),  # sqlite backend
+    SESSION_SWEEP_INTERVAL=60,  # seconds between expired-session sweeps
+    # "loader": first visit gets the loader page, which fires the three beacons and reloads.
+    # "inline": first visit gets the game right away and reports the beacons in one sendBeacon POST.
+    FIRST_VISIT_MODE="loader",
+    FRAGMENT_CACHE_SIZE=1024,  # rendered page fragments kept, shared by all players
+    STREAM_GAME_PAGE=False,  # stream the game page: <head> first, then the body as it renders
+    STREAM_CHUNK_SIZE=1024,  # body bytes buffered per streamed chunk
+    # Render the game without infinite animations, blurs and parallax. Browsers asking
+    # for reduced motion always get it; ?lowpower=1 / ?lowpower=0 overrides per browser.
+    LOW_POWER=False,
+    DOOR_SEED=None,  # set (e.g. LOD_DOOR_SEED=42) to draw door schedules from a seeded PRNG
+    DOOR_POOL_BYTES=4096,  # os.urandom bytes fetched per refill of the door entropy pool
+    EVENT_LOG_DIR=os.path.join(app.instance_path, "events"),  # binary log of every choice; None turns it off
+    EVENT_LOG_SEGMENT_BYTES=64 << 20,  # start a new segment file past this size
+    EVENT_LOG_BUFFER=65536,  # records held in memory for the flush thread; the oldest are dropped past this
+    EVENT_LOG_FLUSH_INTERVAL=1.0,  # seconds between flushes to disk
+    LEADERBOARD_SIZE=10,  # entries shown on /leaderboard
+    LEADERBOARD_PATH=os.path.join(app.instance_path, "leaderboard.bin"),  # snapshot file; None keeps it in memory only
+    LEADERBOARD_SNAPSHOT_INTERVAL=30,  # seconds between snapshots
+    # Token buckets per client and route group: [tokens per second, burst]. {} turns limiting off.
+    # Generous enough for a room of players behind one NAT address; bots get 429s.
+    # A batch counts as one request, and carries up to BATCH_MAX_PICKS picks.
+    RATE_LIMITS={"choose": [20, 60], "batch": [5, 20], "beacon": [10, 30]},
+    RATE_LIMIT_KEY="ip",  # "ip", or "session" (the opaque ID of a server-side SESSION_BACKEND)
+    RATE_LIMIT_TABLE_SIZE=65536,  # bucket slots (24 bytes each); idle clients are evicted past this
+    BATCH_MAX_PICKS=100,  # picks per POST /choose/batch; longer lists are rejected with 413
+    SPECTATE_MAX_SUBSCRIBERS=5000,  # open /spectate/stream connections per process (each holds a thread)
+    SPECTATE_BUFFER=256,  # frames queued per subscriber; a slow viewer loses the oldest past this
+    SPECTATE_INBOX=4096,  # picks waiting for the broadcaster; the oldest are dropped past this
+    SPECTATE_INTERVAL=0.05,  # seconds between broadcasts (picks are batched in between)
+    SPECTATE_KEEPALIVE=15,  # seconds between keep-alive comments on an idle stream
+    # serve.py (production launcher); its command-line options override these
+    SERVE_HOST="0.0.0.0",
+    SERVE_PORT=5000,
+    SERVE_WORKERS=0,  # worker processes, 0 = one per CPU
+    SERVE_BACKLOG=2048,  # listen() backlog shared by all workers
+    SERVE_KEEPALIVE_TIMEOUT=5,  # seconds an idle keep-alive connection is kept open
+    SERVE_GRACEFUL_TIMEOUT=30,  # seconds a stopping worker gets to finish in-flight requests
+    SERVE_MAX_REQUESTS=0,  # recycle each worker after this many requests, 0 = never
+    SERVE_MAX_REQUESTS_JITTER=0,  # up to this many extra requests per worker, so they don't recycle together
+)
+app.config.from_prefixed_env("LOD")
+startup_phase("config")
+
+# Server-side sessions: the cookie only carries an opaque ID, and expiry
+# follows permanent_session_lifetime.
+if app.config["SESSION_BACKEND"] != "cookie":
+    app.session_interface = ServerSideSessionInterface(create_store(app))
+    start_sweeper(app.session_interface.store, app.config["SESSION_SWEEP_INTERVAL"])
+
+# Entropy for door schedules; see doors.py.
+door_source = create_source(app)
+
+# Every evaluated choice is appended to a binary event log; see eventlog.py.
+event_log = None
+if app.config["EVENT_LOG_DIR"]:
+    event_log = EventLog(
+        app.config["EVENT_LOG_DIR"],
+        segment_bytes=app.config["EVENT_LOG_SEGMENT_BYTES"],
+        buffer_records=app.config["EVENT_LOG_BUFFER"],
+        flush_interval=app.config["EVENT_LOG_FLUSH_INTERVAL"],
+    )
+    atexit.register(event_log.close)
+
+# Best streak per player across all runs; see leaderboard.py.
+leaderboard = Leaderboard(app.config["LEADERBOARD_SIZE"])
+if app.config["LEADERBOARD_PATH"]:
+    leaderboard.load(app.config["LEADERBOARD_PATH"])
+    # The snapshot thread is started by the process that serves requests
+    # (serve.py's workers, or the dev server below), never in serve.py's master.
+    atexit.register(leaderboard.snapshot, app.config["LEADERBOARD_PATH"])
+
+# Every pick, live, for the spectator wall; see spectate.py.
+spectators = Broadcaster(
+    inbox_size=app.config["SPECTATE_INBOX"],
+    buffer_size=app.config["SPECTATE_BUFFER"],
+    interval=app.config["SPECTATE_INTERVAL"],
+    keepalive=app.config["SPECTATE_KEEPALIVE"],
+    label=player_label,
+)
+startup_phase("sessions, event log, leaderboard")
+
+# Per-endpoint request counts, latency, body and session-cookie size; see /metrics.
+metrics_registry = Registry()
+metrics_registry.gauge("lod_sessions_stored", "Sessions held by the server-side session store.")
+metrics_registry.counter("lod_batched_beacons_total", "Beacons reported through POST /beacons.")
+metrics_registry.counter("lod_event_log_dropped_total", "Choice records dropped because the event log buffer was full.")
+metrics_registry.counter("lod_ratelimit_evictions_total", "Rate-limit buckets evicted to make room for another client.")
+metrics_registry.gauge("lod_spectate_subscribers", "Open /spectate/stream connections.")
+metrics_registry.counter("lod_spectate_delivered_total", "Picks handed to spectator streams.")
+metrics_registry.counter("lod_spectate_dropped_total", "Picks dropped from slow spectators' buffers.")
+
+# Rate limiting runs in front of Flask (and inside the metrics middleware,
+# so 429s show up in the request metrics too); see ratelimit.py.
+# Flask endpoint -> RATE_LIMITS group; the beacon endpoints are named after their paths.
+RATE_LIMITED_ENDPOINTS = {
+    "choose": "choose",
+    "choose_batch": "batch",
+    "beacons": "beacon",
+    "QU9IRntMMWYzXzByX0QzNHRoXw": "beacon",
+    "VGgzX0c0bTNfMGZfQ2gwMWMzc180bmRf": "beacon",
+    "VGgzX0NoMDFjM19XNHNfTjN2M3JfWTB1cnN9": "beacon",
+}
+if app.config["RATE_LIMIT_KEY"] == "session" and app.config["SESSION_BACKEND"] == "cookie":
+    raise ValueError("RATE_LIMIT_KEY='session' needs a server-side SESSION_BACKEND; signed cookies change on every response")
+rate_table = BucketTable(app.config["RATE_LIMIT_TABLE_SIZE"])
+rate_limiter = None
+if app.config["RATE_LIMITS"]:
+    rate_limiter = app.wsgi_app = RateLimitMiddleware(
+        app.wsgi_app, app, app.config["RATE_LIMITS"], RATE_LIMITED_ENDPOINTS, rate_table,
+        registry=metrics_registry, key=app.config["RATE_LIMIT_KEY"], cookie_name=app.config["SESSION_COOKIE_NAME"],
+        store=getattr(app.session_interface, "store", None),
+    )
+app.wsgi_app = MetricsMiddleware(app.wsgi_app, metrics_registry, app.config["SESSION_COOKIE_NAME"])
+
+# /healthz and /readyz sit outside everything, so probes cost nothing and
+# stay out of the metrics; see health.py. app_ready is set after warm-up.
+app_ready = threading.Event()
+app.wsgi_app = HealthMiddleware(app.wsgi_app, app_ready)
+
+@app.before_request
+def _tag_endpoint():
+    request.environ["lod.endpoint"] = request.endpoint
+
 # =========================
 # Helpers / Game Logic
 # =========================
-def reset_run(preserve_attempts=False, reason=None):
+# The run (round, wins, attempts, history, last outcome) is kept packed in
+# session["g"]; see gamestate.py. The run's correct doors are drawn when it
+# starts and kept as a bit schedule in session["d"]; see doors.py. Routes go
+# through these accessors.
+def load_state():
+    return GameState.decode(session["g"]) if "g" in session else GameState()
+
+def save_state(state):
+    session["g"] = state.encode()
+
+def reset_run(attempts=0, reason=None):
     session.permanent = True
-    if not preserve_attempts or "attempts" not in session:
-        session["attempts"] = 0
-    session["round"] = 1
-    session["wins"] = 0
-    session["history"] = []
+    state = GameState(attempts=attempts)
+    save_state(state)
+    session["d"] = draw_schedule(door_source)
+    session.pop("correct_door", None)  # per-round draw from before schedules
     session["banner"] = reason or ""
-    session["last"] = None  # store last outcome for animation on next render
+    return state
+
+def player_id():
+    # Random and kept across resets, so the event log can follow a player's attempts.
+    if "p" not in session:
+        session["p"] = int.from_bytes(os.urandom(8), "little")
+    return session["p"]
 
-def start_new_attempt(reason=None):
-    session["attempts"] = session.get("attempts", 0) + 1
-    reset_run(preserve_attempts=True, reason=reason)
+def start_new_attempt(state, reason=None):
+    return reset_run(attempts=state.attempts + 1, reason=reason)
 
-def current_correct_door():
+def current_correct_door(state):
     # After 5 wins -> impossible mode (no correct door)
-    if session.get("wins", 0) >= 5:
+    if state.wins >= 5:
         return None
-    return random.choice(["life", "death"])
+    if "d" not in session:
+        session["d"] = draw_schedule(door_source)
+    return scheduled_door(session["d"], state.round)
+
+def play_round(state, pick):
+    # Evaluate one pick against this round's door, then either advance the
+    # run or start a new attempt. Returns (outcome, evaluated row, state after).
+    # The previous banner stays up until here, so GETs never change the session.
+    session.pop("banner", None)
+    correct = current_correct_door(state)
+    outcome = state.record(pick, correct)
+    if event_log is not None:
+        event_log.append(player_id(), state.attempts, state.round, *state.last, outcome == "WIN")
+    row = state.history_rows()[-1]
+    spectators.publish(player_id(), state.attempts, state.round, row["pick"], row["correct_door"],
+                       outcome == "WIN", state.wins + 1 if outcome == "WIN" else 0)
+
+    if outcome == "WIN":
+        state.wins += 1
+        state.round += 1
+        leaderboard.update(player_id(), state.wins)
+        if state.wins >= 10:
+            session["banner"] = "🎉 You cleared all 10 rounds in a row!"
+            state.round = 11
+        save_state(state)
+    else:
+        state = start_new_attempt(state, reason="❌ Wrong guess. Run has been reset to Round 1.")
+    return outcome, row, state
+
+def game_context(state, banner=""):
+    # Everything the game page (and each of its fragments) renders from.
+    wins = max(0, min(state.wins, 10))
+    return dict(
+        game_over=state.round > 10,
+        last=state.last_outcome(),
+        progress_pct=(wins / 10) * 100,
+        banner=banner,
+        wins=state.wins,
+        attempts=state.attempts,
+        history=state.history_rows(),
+    )
+
+def low_power_mode():
+    # ?lowpower=1 / ?lowpower=0, remembered in a cookie; otherwise LOW_POWER.
+    flag = request.args.get("lowpower")
+    if flag in ("0", "1"):
+        @after_this_request
+        def remember(resp):
+            resp.set_cookie("lowpower", flag, max_age=365 * 24 * 3600, samesite="Lax")
+            return resp
+    else:
+        flag = request.cookies.get("lowpower")
+    if flag in ("0", "1"):
+        return flag == "1"
+    return bool(app.config["LOW_POWER"])
+
+def wants_json():
+    return request.accept_mimetypes.best_match(["text/html", "application/json"]) == "application/json"
+
+BEACON_PATHS = (
+    "/QU9IRntMMWYzXzByX0QzNHRoXw",
+    "/VGgzX0c0bTNfMGZfQ2gwMWMzc180bmRf",
+    "/VGgzX0NoMDFjM19XNHNfTjN2M3JfWTB1cnN9",
+)
 
 def _empty_204():
     resp = make_response("", 204)
@@ -37,15 +280,51 @@ def _empty_204():
     return resp
 
 # =========================
-# Routes
+# Static assets
 # =========================
-@app.route("/")
-def home():
-    # Check if requests have been sent using session
-    if not session.get("requests_sent", False):
-        session["requests_sent"] = True
-        session.modified = True
-        return '''
+# Every file in STATIC_DIR is read once at startup and published under a
+# content-hashed name (game.css -> game.3f2a9c0d1e4b.css), so browsers can
+# cache it forever and a deploy that changes a file changes its URL.
+_asset_names = {}  # "game.css" -> "game.3f2a9c0d1e4b.css"
+_asset_files = {}  # "game.3f2a9c0d1e4b.css" -> StaticBody (precompressed)
+
+def load_assets(static_dir, minify=False):
+    _asset_names.clear()
+    _asset_files.clear()
+    for name in sorted(os.listdir(static_dir)):
+        path = os.path.join(static_dir, name)
+        if not os.path.isfile(path):
+            continue
+        with open(path, "rb") as f:
+            body = f.read()
+        stem, ext = os.path.splitext(name)
+        if minify and ext in MINIFIERS:
+            body = MINIFIERS[ext](body.decode("utf-8")).encode("utf-8")
+        hashed = "%s.%s%s" % (stem, hashlib.sha256(body).hexdigest()[:12], ext)
+        mimetype = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        _asset_names[name] = hashed
+        _asset_files[hashed] = StaticBody(body, mimetype)
+
+def asset_url(name):
+    return url_for("asset", filename=_asset_names[name])
+
+load_assets(app.config["STATIC_DIR"], minify=app.config["MINIFY"])
+app.jinja_env.globals["asset_url"] = asset_url
+
+# Webfonts are self-hosted (see fonts.py); without their files the pages
+# use system fonts.
+font_faces, _missing_fonts = available_faces(_asset_names)
+if _missing_fonts:
+    app.logger.warning("Font files missing from %s (%s); falling back to system fonts for %s",
+                       app.config["STATIC_DIR"], ", ".join(_missing_fonts),
+                       ", ".join(sorted({f.family for f in FONT_FACES} - {f.family for f in font_faces})))
+app.jinja_env.globals["font_faces"] = font_faces
+startup_phase("assets")
+
+# =========================
+# Templates
+# =========================
+LOADER_HTML = '''
         <!DOCTYPE html>
         <html>
         <head>
@@ -127,762 +406,29 @@ def home():
         </body>
         </html>
         '''
-    
-    if "round" not in session:
-        reset_run()
-        session["attempts"] = 0
+LOADER_BODY = StaticBody(LOADER_HTML, "text/html")
 
-    game_over = session["round"] > 10
-    correct = current_correct_door()
-    session["correct_door"] = correct
-    banner = session.pop("banner", "")
-    last = session.get("last")
-
-    wins = max(0, min(session.get("wins", 0), 10))
-    progress_pct = (wins / 10) * 100
-
-    return render_template_string("""
+HOME_TEMPLATE_SOURCE = """{% block head %}
 <!doctype html>
 <html lang="en">
 <head>
 <meta charset="utf-8">
 <meta name="viewport" content="width=device-width,initial-scale=1">
 <title>Life or Death — CTF</title>
-<style>
-  @import url('https://fonts.googleapis.com/css2?family=Orbitron:wght@400;500;700;900&family=Rajdhani:wght@300;400;500;600;700&display=swap');
-  
-  :root {
-    --bg: #07080c;
-    --panel: #0d0f1a;
-    --border: #2b2f45;
-    --muted: #aeb3c7;
-    --text: #eef1ff;
-    --accent: #7aa8ff;
-    --life: #32ff9d;
-    --death: #ff5a6e;
-    --warn: #f7d774;
-    --gold: #ffd700;
-    --purple: #a78bfa;
-
-    /* Cinematic timing */
-    --t-open: 1.2s;
-    --t-ripple: .8s;
-    --t-card-in: .8s;
-    --t-doors-in: 1s;
-    --t-shaft: 6s;
-    --ease-cine: cubic-bezier(0.23, 1, 0.32, 1);
-    --ease-bounce: cubic-bezier(0.68, -0.55, 0.27, 1.55);
-    --ease-back: cubic-bezier(0.68, -0.6, 0.32, 1.6);
-  }
-  
-  * { box-sizing: border-box; margin: 0; padding: 0; }
-  html, body { height: 100%; overflow: hidden; }
-  
-  body {
-    margin: 0;
-    background: var(--bg);
-    color: var(--text);
-    font-family: 'Rajdhani', sans-serif;
-    overflow-x: hidden;
-    position: relative;
-  }
-
-  /* Animated background */
-  .bg-animation {
-    position: fixed;
-    top: 0;
-    left: 0;
-    width: 100%;
-    height: 100%;
-    z-index: -1;
-    opacity: 0.4;
-  }
-  
-  .bg-animation span {
-    position: absolute;
-    width: 4px;
-    height: 4px;
-    background: #fff;
-    border-radius: 50%;
-    opacity: 0;
-    animation: star-fall 8s linear infinite;
-  }
-  
-  @keyframes star-fall {
-    0% {
-      transform: translateY(-100px) rotate(0deg);
-      opacity: 1;
-      height: 0;
-    }
-    100% {
-      transform: translateY(100vh) rotate(720deg);
-      opacity: 0;
-      height: 100px;
-    }
-  }
-
-  /* Main container */
-  .wrap {
-    min-height: 100%;
-    display: flex;
-    justify-content: center;
-    align-items: center;
-    padding: 20px;
-    perspective: 1000px;
-  }
-  
-  .card {
-    width: min(1000px, 95vw);
-    background: linear-gradient(145deg, #0d0f1a, #0a0c16);
-    border: 1px solid rgba(255, 255, 255, 0.1);
-    border-radius: 20px;
-    padding: 30px;
-    box-shadow: 0 20px 80px rgba(0, 0, 0, 0.6),
-                inset 0 1px 0 rgba(255, 255, 255, 0.05),
-                0 0 40px rgba(122, 168, 255, 0.2);
-    transform: translateY(20px) rotateX(5deg);
-    opacity: 0;
-    animation: cardIn var(--t-card-in) var(--ease-cine) forwards 0.2s;
-    position: relative;
-    overflow: hidden;
-  }
-  
-  .card::before {
-    content: '';
-    position: absolute;
-    top: 0;
-    left: 0;
-    right: 0;
-    height: 1px;
-    background: linear-gradient(90deg, 
-                transparent, 
-                rgba(255, 255, 255, 0.4), 
-                transparent);
-  }
-  
-  @keyframes cardIn {
-    0% { 
-      opacity: 0;
-      transform: translateY(30px) rotateX(10deg);
-    }
-    100% { 
-      opacity: 1;
-      transform: translateY(0) rotateX(0);
-    }
-  }
-
-  h1 {
-    margin: 0 0 15px;
-    font-size: clamp(2rem, 4vw, 3.5rem);
-    font-family: 'Orbitron', sans-serif;
-    font-weight: 900;
-    text-align: center;
-    background: linear-gradient(135deg, var(--accent), var(--purple));
-    -webkit-background-clip: text;
-    -webkit-text-fill-color: transparent;
-    text-shadow: 0 0 20px rgba(122, 168, 255, 0.5);
-    letter-spacing: 1px;
-    position: relative;
-  }
-  
-  .sub {
-    color: var(--muted);
-    margin-bottom: 20px;
-    text-align: center;
-    font-size: 1.1rem;
-    line-height: 1.5;
-    max-width: 800px;
-    margin-left: auto;
-    margin-right: auto;
-  }
-
-  .stats {
-    display: flex;
-    gap: 12px;
-    flex-wrap: wrap;
-    justify-content: center;
-    margin: 15px 0 20px;
-  }
-  
-  .pill {
-    background: linear-gradient(145deg, #131525, #0f1120);
-    border: 1px solid rgba(255, 255, 255, 0.1);
-    border-radius: 50px;
-    padding: 12px 18px;
-    font-size: 0.95rem;
-    font-weight: 600;
-    box-shadow: 0 4px 12px rgba(0, 0, 0, 0.2),
-                inset 0 1px 0 rgba(255, 255, 255, 0.05);
-    display: flex;
-    align-items: center;
-    gap: 8px;
-  }
-  
-  .progress {
-    height: 16px;
-    background: #0d0f1a;
-    border-radius: 10px;
-    overflow: hidden;
-    margin: 15px 0 20px;
-    border: 1px solid rgba(255, 255, 255, 0.1);
-    box-shadow: inset 0 2px 8px rgba(0, 0, 0, 0.3);
-  }
-  
-  .bar {
-    height: 100%;
-    width: 0;
-    background: linear-gradient(90deg, var(--accent), var(--life));
-    transition: width 1s var(--ease-cine);
-    position: relative;
-    overflow: hidden;
-  }
-  
-  .bar::after {
-    content: '';
-    position: absolute;
-    top: 0;
-    left: 0;
-    right: 0;
-    bottom: 0;
-    background: linear-gradient(90deg, 
-                transparent, 
-                rgba(255, 255, 255, 0.4), 
-                transparent);
-    animation: shine 2s infinite;
-  }
-  
-  @keyframes shine {
-    0% { transform: translateX(-100%); }
-    100% { transform: translateX(100%); }
-  }
-
-  .arena {
-    position: relative;
-    margin-top: 25px;
-    perspective: 1200px;
-    border-radius: 20px;
-    padding: 30px;
-    background: linear-gradient(145deg, rgba(15, 17, 27, 0.6), rgba(10, 12, 22, 0.6));
-    border: 1px solid rgba(255, 255, 255, 0.1);
-    box-shadow: 0 10px 40px rgba(0, 0, 0, 0.3),
-                inset 0 1px 0 rgba(255, 255, 255, 0.05);
-    overflow: hidden;
-    transform-style: preserve-3d;
-  }
-  
-  .arena::before {
-    content: '';
-    position: absolute;
-    top: 0;
-    left: 0;
-    right: 0;
-    bottom: 0;
-    background: 
-        radial-gradient(circle at 20% 30%, rgba(50, 255, 157, 0.1), transparent 25%),
-        radial-gradient(circle at 80% 30%, rgba(255, 90, 110, 0.1), transparent 25%);
-    pointer-events: none;
-  }
-  
-  .doors {
-    display: grid;
-    grid-template-columns: 1fr 1fr;
-    gap: 30px;
-    align-items: stretch;
-    transform: translateY(15px);
-    opacity: 0;
-    animation: doorsIn var(--t-doors-in) var(--ease-cine) 0.3s forwards;
-  }
-  
-  @keyframes doorsIn {
-    0% {
-      opacity: 0;
-      transform: translateY(20px);
-    }
-    100% {
-      opacity: 1;
-      transform: translateY(0);
-    }
-  }
-
-  /* Door styles */
-  .door {
-    position: relative;
-    border: none;
-    padding: 0;
-    border-radius: 18px;
-    isolation: isolate;
-    background: transparent;
-    cursor: pointer;
-    transform-style: preserve-3d;
-    outline: none;
-    transition: all 0.5s var(--ease-cine);
-    animation: doorFloat 6s ease-in-out infinite;
-  }
-  
-  @keyframes doorFloat {
-    0%, 100% { transform: translateY(0) rotateX(0); }
-    50% { transform: translateY(-10px) rotateX(2deg); }
-  }
-  
-  .door:hover {
-    transform: translateY(-8px) scale(1.02);
-    box-shadow: 0 30px 100px rgba(0, 0, 0, 0.6);
-  }
-  
-  .door:disabled {
-    cursor: not-allowed;
-    opacity: 0.7;
-    animation: none;
-    transform: none;
-  }
-  
-  .door .plate {
-    position: relative;
-    border-radius: 18px;
-    padding: 20px;
-    height: 380px;
-    background: linear-gradient(145deg, #0a0c16, #070913);
-    border: 1px solid rgba(255, 255, 255, 0.1);
-    box-shadow: 0 20px 60px rgba(0, 0, 0, 0.5),
-                inset 0 1px 0 rgba(255, 255, 255, 0.05);
-    transition: all 0.6s var(--ease-cine);
-    overflow: hidden;
-  }
-  
-  .aura {
-    position: absolute;
-    inset: 0;
-    border-radius: 18px;
-    filter: blur(30px);
-    opacity: 0.3;
-    z-index: 0;
-    transition: all 0.8s var(--ease-cine);
-  }
-  
-  .aura.life {
-    background: radial-gradient(ellipse at center, rgba(50, 255, 157, 0.8), transparent 70%);
-  }
-  
-  .aura.death {
-    background: radial-gradient(ellipse at center, rgba(255, 90, 110, 0.8), transparent 70%);
-  }
-  
-  .door:hover .aura {
-    opacity: 0.5;
-    filter: blur(40px);
-  }
-  
-  .leaf-wrap {
-    position: absolute;
-    inset: 15px;
-    border-radius: 12px;
-    transform-origin: left center;
-    transform: perspective(1200px) rotateY(0deg);
-    transition: transform var(--t-open) var(--ease-cine);
-    box-shadow: inset 0 10px 30px rgba(0, 0, 0, 0.6),
-                0 20px 50px rgba(0, 0, 0, 0.4);
-    overflow: hidden;
-  }
-  
-  .door.opening .leaf-wrap {
-    transform: perspective(1200px) rotateY(-95deg);
-  }
-  
-  .leaf-shine {
-    opacity: 0.4;
-    transition: opacity 0.4s;
-  }
-  
-  .door:hover .leaf-shine {
-    opacity: 0.8;
-  }
-  
-  .handle {
-    transform-origin: left center;
-    transition: transform 0.3s var(--ease-back);
-  }
-  
-  .door.opening .handle {
-    transform: rotate(-15deg);
-  }
-  
-  .label {
-    position: absolute;
-    left: 0;
-    right: 0;
-    bottom: 20px;
-    text-align: center;
-    z-index: 5;
-    font-weight: 700;
-    letter-spacing: 1px;
-    text-shadow: 0 2px 8px rgba(0, 0, 0, 0.6);
-    font-size: 1.2rem;
-    font-family: 'Orbitron', sans-serif;
-  }
-  
-  .label.life {
-    color: var(--life);
-    text-shadow: 0 0 15px rgba(50, 255, 157, 0.7);
-  }
-  
-  .label.death {
-    color: var(--death);
-    text-shadow: 0 0 15px rgba(255, 90, 110, 0.7);
-  }
-
-  /* Ripple effect */
-  .ripple {
-    position: absolute;
-    border-radius: 50%;
-    pointer-events: none;
-    transform: scale(0);
-    opacity: 0.5;
-    animation: ripple var(--t-ripple) ease-out forwards;
-    background: rgba(255, 255, 255, 0.8);
-  }
-  
-  @keyframes ripple {
-    to {
-      transform: scale(4);
-      opacity: 0;
-    }
-  }
-
-  /* Win/Loss animations */
-  .door.win .plate {
-    animation: winPulse 1.2s var(--ease-cine);
-    border-color: rgba(50, 255, 157, 0.5);
-  }
-  
-  @keyframes winPulse {
-    0% {
-      box-shadow: 0 0 0 0 rgba(50, 255, 157, 0);
-    }
-    50% {
-      box-shadow: 0 0 0 30px rgba(50, 255, 157, 0.25);
-    }
-    100% {
-      box-shadow: 0 0 0 0 rgba(50, 255, 157, 0);
-    }
-  }
-  
-  .door.loss .plate {
-    animation: lossGlow 1s var(--ease-cine);
-    border-color: rgba(255, 90, 110, 0.5);
-  }
-  
-  @keyframes lossGlow {
-    0% {
-      box-shadow: 0 0 0 0 rgba(255, 90, 110, 0);
-    }
-    50% {
-      box-shadow: 0 0 0 30px rgba(255, 90, 110, 0.25);
-    }
-    100% {
-      box-shadow: 0 0 0 0 rgba(255, 90, 110, 0);
-    }
-  }
-
-  /* Screen shake */
-  .shake {
-    animation: shake 0.8s var(--ease-cine);
-  }
-  
-  @keyframes shake {
-    0%, 100% { transform: translateX(0); }
-    15% { transform: translateX(-12px); }
-    30% { transform: translateX(12px); }
-    45% { transform: translateX(-8px); }
-    60% { transform: translateX(8px); }
-    75% { transform: translateX(-4px); }
-    90% { transform: translateX(4px); }
-  }
-  
-  .flash {
-    position: fixed;
-    inset: 0;
-    background: radial-gradient(ellipse at center, rgba(255, 90, 110, 0.3), transparent 70%);
-    pointer-events: none;
-    opacity: 0;
-    animation: flash 0.8s var(--ease-cine);
-    z-index: 998;
-  }
-  
-  @keyframes flash {
-    0% { opacity: 1; }
-    100% { opacity: 0; }
-  }
-
-  /* Banner */
-  .banner {
-    border: 1px solid rgba(255, 255, 255, 0.15);
-    background: linear-gradient(145deg, rgba(24, 27, 44, 0.8), rgba(20, 23, 41, 0.8));
-    padding: 15px 20px;
-    border-radius: 12px;
-    margin: 15px 0 20px;
-    animation: bannerSlideIn 0.6s var(--ease-bounce);
-    backdrop-filter: blur(10px);
-    text-align: center;
-    font-weight: 600;
-  }
-  
-  @keyframes bannerSlideIn {
-    0% {
-      transform: translateY(-20px);
-      opacity: 0;
-    }
-    100% {
-      transform: translateY(0);
-      opacity: 1;
-    }
-  }
-  
-  .meta {
-    color: var(--muted);
-    font-size: 1rem;
-    margin-top: 15px;
-    text-align: center;
-    font-style: italic;
-  }
-
-  /* History table */
-  .history {
-    margin-top: 30px;
-  }
-  
-  table {
-    width: 100%;
-    border-collapse: collapse;
-    background: rgba(15, 17, 27, 0.5);
-    border-radius: 12px;
-    overflow: hidden;
-    box-shadow: 0 5px 20px rgba(0, 0, 0, 0.2);
-  }
-  
-  th, td {
-    text-align: left;
-    padding: 12px 15px;
-    border-bottom: 1px solid rgba(255, 255, 255, 0.1);
-  }
-  
-  th {
-    background: rgba(20, 23, 41, 0.8);
-    font-weight: 600;
-    text-transform: uppercase;
-    letter-spacing: 1px;
-    font-size: 0.9rem;
-  }
-  
-  tr:last-child td {
-    border-bottom: none;
-  }
-  
-  .ok {
-    color: var(--life);
-    font-weight: 700;
-  }
-  
-  .bad {
-    color: var(--death);
-    font-weight: 700;
-  }
-
-  .btn {
-    display: inline-block;
-    margin-top: 15px;
-    border: 1px solid rgba(255, 255, 255, 0.15);
-    background: linear-gradient(145deg, #16192b, #131525);
-    color: var(--text);
-    padding: 12px 20px;
-    border-radius: 12px;
-    text-decoration: none;
-    font-weight: 600;
-    transition: all 0.3s var(--ease-cine);
-    box-shadow: 0 4px 12px rgba(0, 0, 0, 0.2);
-  }
-  
-  .btn:hover {
-    border-color: var(--accent);
-    transform: translateY(-3px);
-    box-shadow: 0 8px 20px rgba(0, 0, 0, 0.3),
-                0 0 15px rgba(122, 168, 255, 0.3);
-  }
-
-  /* Confetti */
-  .confetti {
-    position: fixed;
-    inset: 0;
-    pointer-events: none;
-    overflow: hidden;
-    z-index: 997;
-  }
-  
-  .confetti i {
-    position: absolute;
-    width: 12px;
-    height: 12px;
-    opacity: 0;
-    animation: drop 1.5s ease-in forwards;
-  }
-  
-  @keyframes drop {
-    0% {
-      transform: translateY(-40vh) rotate(0deg);
-      opacity: 1;
-    }
-    100% {
-      transform: translateY(110vh) rotate(720deg);
-      opacity: 0;
-    }
-  }
-
-  /* Result overlay */
-  .result-overlay {
-    position: fixed;
-    inset: 0;
-    display: flex;
-    align-items: center;
-    justify-content: center;
-    pointer-events: none;
-    z-index: 999;
-    opacity: 0;
-  }
-  
-  .result-message {
-    font-size: 5rem;
-    font-family: 'Orbitron', sans-serif;
-    font-weight: 900;
-    text-transform: uppercase;
-    letter-spacing: 4px;
-    padding: 2rem 4rem;
-    border-radius: 16px;
-    transform: scale(0.8);
-    animation: resultMessage 1.5s var(--ease-bounce) forwards;
-    backdrop-filter: blur(10px);
-    box-shadow: 0 10px 40px rgba(0, 0, 0, 0.3);
-  }
-  
-  .win-message {
-    background: linear-gradient(135deg, rgba(50, 255, 157, 0.2), rgba(50, 255, 157, 0.1));
-    color: var(--life);
-    text-shadow: 0 0 30px rgba(50, 255, 157, 0.8);
-    border: 2px solid rgba(50, 255, 157, 0.3);
-  }
-  
-  .loss-message {
-    background: linear-gradient(135deg, rgba(255, 90, 110, 0.2), rgba(255, 90, 110, 0.1));
-    color: var(--death);
-    text-shadow: 0 0 30px rgba(255, 90, 110, 0.8);
-    border: 2px solid rgba(255, 90, 110, 0.3);
-  }
-  
-  @keyframes resultMessage {
-    0% {
-      opacity: 0;
-      transform: scale(0.8) translateY(50px);
-    }
-    70% {
-      transform: scale(1.1);
-    }
-    100% {
-      opacity: 1;
-      transform: scale(1) translateY(0);
-    }
-  }
-
-  /* Particle effects */
-  .particle {
-    position: absolute;
-    pointer-events: none;
-    animation: particleFloat 1.5s ease-out forwards;
-  }
-  
-  @keyframes particleFloat {
-    0% {
-      transform: translate(0, 0) scale(0);
-      opacity: 1;
-    }
-    100% {
-      transform: translate(var(--tx), var(--ty)) scale(1);
-      opacity: 0;
-    }
-  }
-
-  /* Streak indicator */
-  .streak-indicator {
-    position: fixed;
-    top: 20px;
-    right: 20px;
-    background: linear-gradient(145deg, rgba(35, 38, 58, 0.9), rgba(25, 28, 48, 0.9));
-    border: 1px solid rgba(255, 215, 116, 0.3);
-    border-radius: 12px;
-    padding: 12px 18px;
-    font-weight: bold;
-    backdrop-filter: blur(10px);
-    transform: translateY(-100px);
-    opacity: 0;
-    transition: all 0.6s var(--ease-cine);
-    z-index: 100;
-    display: flex;
-    align-items: center;
-    gap: 8px;
-    box-shadow: 0 5px 20px rgba(0, 0, 0, 0.3);
-  }
-  
-  .streak-indicator.active {
-    transform: translateY(0);
-    opacity: 1;
-  }
-  
-  .streak-indicator .fire {
-    display: inline-block;
-    margin-right: 8px;
-    animation: firePulse 1s infinite alternate;
-    filter: drop-shadow(0 0 5px rgba(255, 215, 116, 0.8));
-  }
-  
-  @keyframes firePulse {
-    from { transform: scale(1); }
-    to { transform: scale(1.2); }
-  }
-
-  /* Impossible mode warning */
-  .impossible-warning {
-    position: fixed;
-    bottom: 20px;
-    left: 50%;
-    transform: translateX(-50%);
-    background: linear-gradient(145deg, rgba(255, 90, 110, 0.2), rgba(255, 90, 110, 0.1));
-    border: 1px solid rgba(255, 90, 110, 0.3);
-    border-radius: 12px;
-    padding: 12px 20px;
-    font-weight: 600;
-    backdrop-filter: blur(10px);
-    animation: warningPulse 2s infinite alternate;
-    z-index: 100;
-    text-align: center;
-  }
-  
-  @keyframes warningPulse {
-    from {
-      box-shadow: 0 0 10px rgba(255, 90, 110, 0.3);
-    }
-    to {
-      box-shadow: 0 0 20px rgba(255, 90, 110, 0.5);
-    }
-  }
-</style>
+{% include FONTS_TEMPLATE %}
+<link rel="stylesheet" href="{{ asset_url('game.css') }}">
+<link rel="stylesheet" href="{{ asset_url('lowpower.css') }}"{% if not low_power %} media="(prefers-reduced-motion: reduce)"{% endif %}>
 </head>
+{% endblock %}{% block body %}
 <body>
-  <!-- Animated background -->
-  <div class="bg-animation" id="bg-animation"></div>
+  <!-- Animated background and effects layer (drawn by game.js) -->
+  <canvas class="bg-animation" id="bg-animation"></canvas>
+  <canvas class="fx-layer" id="fx-layer"></canvas>
 
   <!-- Impossible mode warning -->
-  {% if session["wins"] >= 5 %}
-  <div class="impossible-warning">
+  <div class="impossible-warning" id="impossible-warning"{% if wins < 5 %} hidden{% endif %}>
     ⚠️ IMPOSSIBLE MODE ACTIVATED - NO CORRECT DOORS
   </div>
-  {% endif %}
 
   <!-- Streak indicator -->
   <div class="streak-indicator" id="streak-indicator">
@@ -894,22 +440,29 @@ def home():
       <h1>LIFE OR DEATH</h1>
       <div class="sub">Clear <b>10 rounds in a row</b>. One mistake resets your run. After <b>5 wins</b>, it becomes <i>impossible</i> to pick the correct door.</div>
 
-      {% if banner %}
-        <div class="banner">{{ banner }}</div>
-      {% endif %}
+      <div id="banner-slot">
+        {% block banner %}
+        {% if banner %}
+          <div class="banner">{{ banner }}</div>
+        {% endif %}
+        {% endblock %}
+      </div>
 
+      {% block stats %}
       <div class="stats">
-        <div class="pill">Attempt: {{ session["attempts"] + 1 }}</div>
-        <div class="pill">Round: {{ session["wins"] + 1 if not game_over else 10 }}/10</div>
-        <div class="pill">Current Streak: {{ session["wins"] }}</div>
-        {% if session["wins"] >= 5 %}
-          <div class="pill">⚠️ Impossible mode</div>
-        {% endif %}
+        <div class="pill" id="pill-attempt">Attempt: {{ attempts + 1 }}</div>
+        <div class="pill" id="pill-round">Round: {{ wins + 1 if not game_over else 10 }}/10</div>
+        <div class="pill" id="pill-streak">Current Streak: {{ wins }}</div>
+        <div class="pill" id="pill-impossible"{% if wins < 5 %} hidden{% endif %}>⚠️ Impossible mode</div>
       </div>
+      {% endblock %}
+      {% block progress %}
       <div class="progress" aria-hidden="true">
-        <div class="bar" style="width: {{ progress_pct }}%;"></div>
+        <div class="bar" id="progress-bar" style="width: {{ progress_pct }}%;"></div>
       </div>
+      {% endblock %}
 
+      {% block doors %}
       <div class="arena">
         {% if not game_over %}
         <form id="choose-form" class="doors" method="post" action="{{ url_for('choose') }}">
@@ -920,39 +473,8 @@ def home():
             <div class="plate">
               <div class="leaf-wrap">
                 <!-- SVG door art -->
-                <svg viewBox="0 0 300 450" width="100%" height="100%" aria-hidden="true">
-                  <defs>
-                    <linearGradient id="lifeWood" x1="0" x2="0" y1="0" y2="1">
-                      <stop offset="0%" stop-color="#1b2a1f"/>
-                      <stop offset="100%" stop-color="#0f1a12"/>
-                    </linearGradient>
-                    <linearGradient id="lifeEdge" x1="0" x2="1" y1="0" y2="0">
-                      <stop offset="0%" stop-color="#0b120e"/>
-                      <stop offset="100%" stop-color="#253c2e"/>
-                    </linearGradient>
-                    <filter id="lifeGlow" x="-50%" y="-50%" width="200%" height="200%">
-                      <feGaussianBlur in="SourceGraphic" stdDeviation="5" result="blur"/>
-                      <feColorMatrix in="blur" mode="matrix" values="1 0 0 0 0  0 1 0 0 0  0 0 1 0 0  0 0 0 30 -8" result="glow"/>
-                      <feComposite in="SourceGraphic" in2="glow" operator="over"/>
-                    </filter>
-                  </defs>
-                  <!-- Frame -->
-                  <rect x="14" y="10" width="272" height="430" rx="10" fill="url(#lifeEdge)" />
-                  <!-- Door panel -->
-                  <rect x="26" y="22" width="248" height="406" rx="8" fill="url(#lifeWood)"/>
-                  <!-- Inset panels -->
-                  <rect x="46" y="48" width="208" height="120" rx="6" fill="#13231a"/>
-                  <rect x="46" y="188" width="208" height="120" rx="6" fill="#13231a"/>
-                  <rect x="46" y="328" width="208" height="80" rx="6" fill="#13231a"/>
-                  <!-- Shine -->
-                  <path class="leaf-shine" d="M26,22 L140,22 L100,428 L26,428 Z" fill="rgba(255,255,255,.08)"/>
-                  <!-- Handle -->
-                  <g class="handle" filter="url(#lifeGlow)">
-                    <circle cx="250" cy="240" r="8" fill="#d2eada"/>
-                    <rect x="248" y="240" width="4" height="22" fill="#9bd6bf"/>
-                  </g>
-                  <!-- Glow effect -->
-                  <circle cx="250" cy="240" r="12" fill="rgba(50, 255, 157, 0.3)" filter="url(#lifeGlow)" />
+                <svg class="door-art life" viewBox="0 0 300 450" width="100%" height="100%" aria-hidden="true">
+                  <use href="{{ asset_url('doors.svg') }}#door"/>
                 </svg>
               </div>
               <div class="label life">🚪 LIFE</div>
@@ -966,47 +488,16 @@ def home():
             <div class="plate">
               <div class="leaf-wrap">
                 <!-- SVG door art -->
-                <svg viewBox="0 0 300 450" width="100%" height="100%" aria-hidden="true">
-                  <defs>
-                    <linearGradient id="deathWood" x1="0" x2="0" y1="0" y2="1">
-                      <stop offset="0%" stop-color="#2a1416"/>
-                      <stop offset="100%" stop-color="#170a0b"/>
-                    </linearGradient>
-                    <linearGradient id="deathEdge" x1="0" x2="1" y1="0" y2="0">
-                      <stop offset="0%" stop-color="#0d0607"/>
-                      <stop offset="100%" stop-color="#3d1c22"/>
-                    </linearGradient>
-                    <filter id="deathGlow" x="-50%" y="-50%" width="200%" height="200%">
-                      <feGaussianBlur in="SourceGraphic" stdDeviation="5" result="blur"/>
-                      <feColorMatrix in="blur" mode="matrix" values="1 0 0 0 0  0 1 0 0 0  0 0 1 0 0  0 0 0 30 -8" result="glow"/>
-                      <feComposite in="SourceGraphic" in2="glow" operator="over"/>
-                    </filter>
-                  </defs>
-                  <!-- Frame -->
-                  <rect x="14" y="10" width="272" height="430" rx="10" fill="url(#deathEdge)" />
-                  <!-- Door panel -->
-                  <rect x="26" y="22" width="248" height="406" rx="8" fill="url(#deathWood)"/>
-                  <!-- Inset panels -->
-                  <rect x="46" y="48" width="208" height="120" rx="6" fill="#241316"/>
-                  <rect x="46" y="188" width="208" height="120" rx="6" fill="#241316"/>
-                  <rect x="46" y="328" width="208" height="80" rx="6" fill="#241316"/>
-                  <!-- Shine -->
-                  <path class="leaf-shine" d="M26,22 L140,22 L100,428 L26,428 Z" fill="rgba(255,255,255,.08)"/>
-                  <!-- Handle -->
-                  <g class="handle" filter="url(#deathGlow)">
-                    <circle cx="250" cy="240" r="8" fill="#ffd1d6"/>
-                    <rect x="248" y="240" width="4" height="22" fill="#ff9aaa"/>
-                  </g>
-                  <!-- Glow effect -->
-                  <circle cx="250" cy="240" r="12" fill="rgba(255, 90, 110, 0.3)" filter="url(#deathGlow)" />
+                <svg class="door-art death" viewBox="0 0 300 450" width="100%" height="100%" aria-hidden="true">
+                  <use href="{{ asset_url('doors.svg') }}#door"/>
                 </svg>
               </div>
               <div class="label death">☠️ DEATH</div>
             </div>
           </button>
         </form>
-        <div class="meta">
-          {% if session["wins"] < 5 %}
+        <div class="meta" id="door-meta">
+          {% if wins < 5 %}
             Correct door is randomly assigned each round.
           {% else %}
             <b>Impossible mode:</b> no door can be correct now. Any pick will reset your run.
@@ -1017,17 +508,19 @@ def home():
           <a class="btn" href="{{ url_for('hard_reset') }}">🔁 Start over</a>
         {% endif %}
       </div>
+      {% endblock %}
 
-      <div class="history">
+      {% block history %}
+      <div class="history" id="history">
         <h3 style="margin:18px 0 8px;">This Run</h3>
-        {% if session["history"] %}
+        {% if history %}
           <table>
             <thead><tr><th>#</th><th>Your pick</th><th>Outcome</th><th>Correct door</th></tr></thead>
             <tbody>
-              {% for h in session["history"] %}
+              {% for h in history %}
                 <tr>
                   <td>{{ h["round"] }}</td>
-                  <td>{{ h["pick"] }}</td>
+                  <td>{{ h["pick"] or '—' }}</td>
                   <td class="{{ 'ok' if h['outcome']=='WIN' else 'bad' }}">{{ h["outcome"] }}</td>
                   <td>{{ h["correct_door"] if h["correct_door"] is not none else '—' }}</td>
                 </tr>
@@ -1038,6 +531,8 @@ def home():
           <div class="meta">No rounds played yet in this run.</div>
         {% endif %}
       </div>
+      {% endblock %}
+      <div class="meta" style="margin-top:14px;"><a href="{{ url_for('leaderboard_view') }}">🏆 Leaderboard</a> · <a href="{{ url_for('spectate') }}">📺 Live wall</a></div>
     </div>
   </div>
 
@@ -1051,243 +546,350 @@ def home():
     <div class="result-message" id="result-message"></div>
   </div>
 
-<script>
-(function(){
-  "use strict";
-
-  // Create animated background
-  const bgAnimation = document.getElementById('bg-animation');
-  if (bgAnimation) {
-    for (let i = 0; i < 50; i++) {
-      const star = document.createElement('span');
-      star.style.left = Math.random() * 100 + 'vw';
-      star.style.animationDelay = Math.random() * 8 + 's';
-      star.style.animationDuration = (5 + Math.random() * 10) + 's';
-      bgAnimation.appendChild(star);
-    }
-  }
-
-  // Parallax effect on card
-  const card = document.querySelector('.card');
-  if (card) {
-    let raf = null;
-    
-    document.addEventListener('mousemove', (e) => {
-      if (raf) cancelAnimationFrame(raf);
-      
-      raf = requestAnimationFrame(() => {
-        const x = (e.clientX / window.innerWidth - 0.5) * 10;
-        const y = (e.clientY / window.innerHeight - 0.5) * 10;
-        
-        card.style.transform = `rotateY(${x}deg) rotateX(${-y}deg)`;
-      });
-    });
-    
-    document.addEventListener('mouseleave', () => {
-      if (raf) cancelAnimationFrame(raf);
-      card.style.transform = 'rotateY(0deg) rotateX(0deg)';
-    });
-  }
-
-  // Door interaction
-  const form = document.getElementById('choose-form');
-  if (form) {
-    const doors = Array.from(form.querySelectorAll('.door'));
-    let submitting = false;
-
-    doors.forEach(btn => {
-      btn.addEventListener('click', (ev) => {
-        if (submitting) {
-          ev.preventDefault();
-          return;
-        }
-        
-        submitting = true;
-
-        // Disable other door immediately
-        doors.forEach(d => {
-          if (d !== btn) d.disabled = true;
-        });
-
-        // Ripple effect
-        const rect = btn.getBoundingClientRect();
-        const ripple = document.createElement('span');
-        ripple.className = 'ripple';
-        const x = ev.clientX - rect.left;
-        const y = ev.clientY - rect.top;
-        ripple.style.left = (x - 20) + 'px';
-        ripple.style.top = (y - 20) + 'px';
-        ripple.style.width = ripple.style.height = '40px';
-        btn.appendChild(ripple);
-
-        // Open animation
-        btn.classList.add('opening');
-
-        // Ensure clicked value is sent
-        const hidden = document.createElement('input');
-        hidden.type = 'hidden';
-        hidden.name = btn.name;
-        hidden.value = btn.value;
-        form.appendChild(hidden);
-
-        // Submit after animation
-        setTimeout(() => form.submit(), 800);
-      });
-    });
-  }
-
-  // Handle win/loss animations
-  const last = {{ (last|tojson) if last else 'null' }};
-  if (last) {
-    if (last.outcome === "WIN") {
-      // Show win animation
-      const overlay = document.getElementById('result-overlay');
-      const message = document.getElementById('result-message');
-      overlay.style.opacity = '1';
-      message.textContent = 'CORRECT!';
-      message.classList.add('win-message');
-      
-      // Create particles
-      createParticles(40, last.pick === 'life' ? '#32ff9d' : '#7aa8ff');
-      
-      // Show streak indicator if applicable
-      const streak = {{ session.get('wins', 0) }};
-      if (streak > 1) {
-        const indicator = document.getElementById('streak-indicator');
-        const count = document.getElementById('streak-count');
-        count.textContent = streak;
-        indicator.classList.add('active');
-        
-        // Auto-hide after 3 seconds
-        setTimeout(() => {
-          indicator.classList.remove('active');
-        }, 3000);
-      }
-      
-      // Confetti
-      const confetti = document.createElement('div');
-      confetti.className = 'confetti';
-      const colors = ['#32ff9d', '#7aa8ff', '#f7d774', '#ff5a6e', '#a78bfa'];
-      
-      for (let i = 0; i < 50; i++) {
-        const piece = document.createElement('i');
-        piece.style.left = Math.random() * 100 + 'vw';
-        piece.style.background = colors[Math.floor(Math.random() * colors.length)];
-        piece.style.animationDelay = (Math.random() * 0.5) + 's';
-        piece.style.animationDuration = (1 + Math.random() * 1.5) + 's';
-        confetti.appendChild(piece);
-      }
-      
-      document.body.appendChild(confetti);
-      setTimeout(() => confetti.remove(), 2000);
-      
-      // Hide message after delay
-      setTimeout(() => {
-        overlay.style.opacity = '0';
-      }, 1500);
-    } else {
-      // Show loss animation
-      const overlay = document.getElementById('result-overlay');
-      const message = document.getElementById('result-message');
-      overlay.style.opacity = '1';
-      message.textContent = 'WRONG!';
-      message.classList.add('loss-message');
-      
-      // Create particles
-      createParticles(30, '#ff5a6e');
-      
-      // Hide message after delay
-      setTimeout(() => {
-        overlay.style.opacity = '0';
-      }, 1500);
-    }
-  }
-  
-  // Show current streak on page load if applicable
-  const streak = {{ session.get('wins', 0) }};
-  if (streak > 1) {
-    const indicator = document.getElementById('streak-indicator');
-    const count = document.getElementById('streak-count');
-    count.textContent = streak;
-    indicator.classList.add('active');
-    
-    // Auto-hide after 3 seconds
-    setTimeout(() => {
-      indicator.classList.remove('active');
-    }, 3000);
-  }
-  
-  // Function to create floating particles
-  function createParticles(count, color) {
-    for (let i = 0; i < count; i++) {
-      const particle = document.createElement('div');
-      particle.className = 'particle';
-      particle.style.background = color;
-      particle.style.width = (4 + Math.random() * 8) + 'px';
-      particle.style.height = particle.style.width;
-      particle.style.borderRadius = '50%';
-      particle.style.left = '50%';
-      particle.style.top = '50%';
-      particle.style.setProperty('--tx', (Math.random() * 200 - 100) + 'px');
-      particle.style.setProperty('--ty', (Math.random() * 200 - 100) + 'px');
-      document.body.appendChild(particle);
-      
-      // Remove particle after animation completes
-      setTimeout(() => {
-        particle.remove();
-      }, 1500);
-    }
-  }
-})();
-</script>
+<script id="game-data" type="application/json">{{ {"last": last, "streak": wins, "beacons": beacons, "low_power": low_power}|tojson }}</script>
+<script src="{{ asset_url('game.js') }}"></script>
+</body>
+</html>
+    {% endblock %}"""
+
+LEADERBOARD_TEMPLATE_SOURCE = """
+<!doctype html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width,initial-scale=1">
+<title>Leaderboard — Life or Death</title>
+{% include FONTS_TEMPLATE %}
+<link rel="stylesheet" href="{{ asset_url('game.css') }}">
+</head>
+<body>
+  <div class="wrap">
+    <div class="card">
+      <h1>LEADERBOARD</h1>
+      <div class="sub">Best streak of each of <b>{{ players }}</b> players. Ties go to whoever got there first.</div>
+      {% if you %}
+      <div class="stats">
+        <div class="pill">Your rank: {{ you["rank"] }}</div>
+        <div class="pill">Your best: {{ you["best"] }}</div>
+      </div>
+      {% endif %}
+      <div class="history">
+        {% if top %}
+          <table>
+            <thead><tr><th>#</th><th>Player</th><th>Best streak</th></tr></thead>
+            <tbody>
+              {% for row in top %}
+                <tr{% if row["you"] %} class="ok"{% endif %}>
+                  <td>{{ row["rank"] }}</td>
+                  <td>{{ row["player"] }}{% if row["you"] %} (you){% endif %}</td>
+                  <td>{{ row["best"] }}</td>
+                </tr>
+              {% endfor %}
+            </tbody>
+          </table>
+        {% else %}
+          <div class="meta">Nobody has won a round yet.</div>
+        {% endif %}
+      </div>
+      <a class="btn" href="{{ url_for('home') }}" style="margin-top:16px;">🚪 Back to the doors</a>
+    </div>
+  </div>
 </body>
 </html>
-    """, game_over=game_over, last=last, progress_pct=progress_pct)
+"""
 
+SPECTATE_TEMPLATE_SOURCE = """
+<!doctype html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width,initial-scale=1">
+<title>Live — Life or Death</title>
+{% include FONTS_TEMPLATE %}
+<link rel="stylesheet" href="{{ asset_url('game.css') }}">
+</head>
+<body>
+  <div class="wrap">
+    <div class="card">
+      <h1>LIVE</h1>
+      <div class="sub">Every door picked, as it happens. <span id="wall-status">Connecting…</span></div>
+      <div class="stats">
+        <div class="pill" id="wall-picks">Picks: 0</div>
+        <div class="pill" id="wall-wins">Wins: 0</div>
+        <div class="pill" id="wall-losses">Losses: 0</div>
+        <div class="pill" id="wall-best">Best streak: 0</div>
+      </div>
+      <div class="history">
+        <table>
+          <thead><tr><th>Time</th><th>Player</th><th>Attempt</th><th>Round</th><th>Pick</th><th>Outcome</th><th>Streak</th></tr></thead>
+          <tbody id="wall-rows"></tbody>
+        </table>
+      </div>
+      <a class="btn" href="{{ url_for('home') }}" style="margin-top:16px;">🚪 Back to the doors</a>
+    </div>
+  </div>
+<script src="{{ asset_url('spectate.js') }}" data-stream="{{ url_for('spectate_stream') }}"></script>
+</body>
+</html>
+"""
+
+# Preloads and @font-face rules for the self-hosted fonts, in both pages' <head>.
+FONTS_TEMPLATE_SOURCE = """
+{%- for face in font_faces if face.preload %}
+<link rel="preload" href="{{ asset_url(face.file) }}" as="font" type="font/woff2" crossorigin>
+{%- endfor %}
+{%- if font_faces %}
+<style>
+{%- for face in font_faces %}
+@font-face { font-family: '{{ face.family }}'; font-weight: {{ face.weight }}; font-display: swap; src: url({{ asset_url(face.file) }}) format('woff2'); }
+{%- endfor %}
+</style>
+{%- endif %}
+"""
+
+# Compile once at import; every request reuses the same Template object.
+# With TEMPLATE_CACHE_DIR set, the compiled bytecode is also kept on disk
+# so freshly started workers skip compilation entirely.
+if app.config["TEMPLATE_CACHE_DIR"]:
+    os.makedirs(app.config["TEMPLATE_CACHE_DIR"], exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(app.config["TEMPLATE_CACHE_DIR"])
+
+# With MINIFY the sources are minified first; see minify.py.
+_template_sources = {
+    "home.html": HOME_TEMPLATE_SOURCE,
+    "leaderboard.html": LEADERBOARD_TEMPLATE_SOURCE,
+    "spectate.html": SPECTATE_TEMPLATE_SOURCE,
+    "fonts.html": FONTS_TEMPLATE_SOURCE,
+}
+if app.config["MINIFY"]:
+    _template_sources = {name: minify_html(source) for name, source in _template_sources.items()}
+_template_loader = DictLoader(_template_sources)
+HOME_TEMPLATE = _template_loader.load(app.jinja_env, "home.html", app.jinja_env.make_globals(None))
+LEADERBOARD_TEMPLATE = _template_loader.load(app.jinja_env, "leaderboard.html", app.jinja_env.make_globals(None))
+SPECTATE_TEMPLATE = _template_loader.load(app.jinja_env, "spectate.html", app.jinja_env.make_globals(None))
+FONTS_TEMPLATE = _template_loader.load(app.jinja_env, "fonts.html", app.jinja_env.make_globals(None))
+app.jinja_env.globals["FONTS_TEMPLATE"] = FONTS_TEMPLATE
+
+# Changes whenever the page markup or any asset URL it references changes.
+TEMPLATE_VERSION = hashlib.sha256(
+    (_template_sources["home.html"] + _template_sources["fonts.html"] + repr(sorted(_asset_names.items()))).encode("utf-8")
+).hexdigest()[:12]
+startup_phase("templates")
+
+# =========================
+# Fragments
+# =========================
+# The game page's named blocks can be rendered on their own through
+# GET /fragment/<name>. Each block maps to the context values it renders
+# from; the HTML depends on nothing else, so it is cached by those inputs
+# and shared by every player in the same situation.
+FRAGMENT_INPUTS = {
+    "banner": lambda ctx: ctx["banner"],
+    "stats": lambda ctx: (ctx["attempts"], ctx["wins"], ctx["game_over"]),
+    "progress": lambda ctx: ctx["progress_pct"],
+    "doors": lambda ctx: (ctx["game_over"], ctx["wins"] >= 5,
+                          ctx["last"] and (ctx["last"]["pick"], ctx["last"]["outcome"])),
+    "history": lambda ctx: tuple((h["pick"], h["correct_door"]) for h in ctx["history"]),
+}
+
+_fragment_cache = OrderedDict()  # (name, inputs) -> html, least recently used first
+_fragment_lock = threading.Lock()
+
+def fragment_etag(name, inputs):
+    digest = hashlib.blake2b(repr((name, inputs)).encode("utf-8"), digest_size=8).hexdigest()
+    return "%s-%s-%s" % (name, TEMPLATE_VERSION, digest)
+
+def page_etag(*parts):
+    # Strong validator for a session-rendered response. The packed run state
+    # (session["g"]) already covers round, wins, attempts, history and last.
+    digest = hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=8).hexdigest()
+    return "%s-%s" % (TEMPLATE_VERSION, digest)
+
+def conditional_response(etag, render):
+    # 304 without calling render() when the client already has this version.
+    # A strong tag has to differ per representation, so the encoding
+    # _compress() will negotiate is part of it; the 200 and its 304 carry the
+    # same tag and both vary on Accept-Encoding.
+    encoding = negotiate(request.accept_encodings)
+    if encoding:
+        etag = "%s-%s" % (etag, encoding)
+    if request.if_none_match.contains_weak(etag):
+        resp = make_response("", 304)
+    else:
+        resp = make_response(render())
+    resp.set_etag(etag)
+    resp.vary.add("Accept-Encoding")
+    resp.headers["Cache-Control"] = "private, no-cache"
+    return resp
+
+def render_fragment(name, ctx, inputs):
+    key = (name, inputs)
+    with _fragment_lock:
+        html = _fragment_cache.get(key)
+        if html is not None:
+            _fragment_cache.move_to_end(key)
+            return html
+
+    ctx = dict(ctx)
+    app.update_template_context(ctx)
+    html = "".join(HOME_TEMPLATE.blocks[name](HOME_TEMPLATE.new_context(ctx)))
+
+    with _fragment_lock:
+        _fragment_cache[key] = html
+        while len(_fragment_cache) > app.config["FRAGMENT_CACHE_SIZE"]:
+            _fragment_cache.popitem(last=False)
+    return html
+
+def stream_game_page(ctx):
+    # The head (doctype, meta, stylesheet link) only depends on asset URLs,
+    # so it goes out before any game state is rendered. The body follows in
+    # STREAM_CHUNK_SIZE pieces; with compression each piece is sync-flushed.
+    app.update_template_context(ctx)
+    context = HOME_TEMPLATE.new_context(ctx)
+    yield "".join(HOME_TEMPLATE.blocks["head"](context))
+
+    chunk_size = app.config["STREAM_CHUNK_SIZE"]
+    buf, size = [], 0
+    for piece in HOME_TEMPLATE.blocks["body"](context):
+        buf.append(piece)
+        size += len(piece)
+        if size >= chunk_size:
+            yield "".join(buf)
+            buf, size = [], 0
+    if buf:
+        yield "".join(buf)
+
+# =========================
+# Compression
+# =========================
+@app.after_request
+def _compress(resp):
+    return compress_response(resp, request.accept_encodings,
+                             min_size=app.config["COMPRESS_MIN_SIZE"],
+                             level=app.config["COMPRESS_LEVEL"])
+
+# =========================
+# Routes
+# =========================
+@app.route("/")
+def home():
+    # Check if requests have been sent using session
+    first_visit = not session.get("requests_sent", False)
+    if first_visit:
+        session["requests_sent"] = True
+        session.modified = True
+        if app.config["FIRST_VISIT_MODE"] != "inline":
+            return LOADER_BODY.response(request.accept_encodings)
+    
+    if "g" not in session:
+        reset_run()
+    low_power = low_power_mode()
+
+    def render():
+        ctx = game_context(load_state(), session.get("banner", ""))
+        ctx["beacons"] = BEACON_PATHS if first_visit else None
+        ctx["low_power"] = low_power
+        if app.config["STREAM_GAME_PAGE"]:
+            # All session changes above are done; the cookie is written before the body streams.
+            return Response(stream_with_context(stream_game_page(ctx)), mimetype="text/html")
+        return render_template(HOME_TEMPLATE, **ctx)
+
+    if first_visit:
+        return render()  # the inline first visit also carries the beacons
+    return conditional_response(page_etag("home", session["g"], session.get("banner", ""), low_power), render)
+
+# Form posts get the classic redirect back to home(). Clients asking for
+# JSON (Accept: application/json) get the outcome and the new run state in
+# the same response, so the page can update itself without navigating.
 @app.route("/choose", methods=["POST"])
 def choose():
-    if "round" not in session:
+    if "g" not in session:
         reset_run()
-        session["attempts"] = 0
 
-    if session["round"] > 10:
+    state = load_state()
+    if state.round > 10:
+        if wants_json():
+            return jsonify(error="game over"), 409
         return redirect(url_for("home"))
 
     pick = request.form.get("door")
-    correct = session.get("correct_door")
-
-    # Evaluate
-    if correct is None:
-        outcome = "LOSS"
-    else:
-        outcome = "WIN" if pick == correct else "LOSS"
+    if pick is None and request.is_json:
+        body = request.get_json(silent=True)
+        if isinstance(body, dict) and isinstance(body.get("door"), str):
+            pick = body["door"]
 
-    session["history"].append({
-        "round": session["round"],
-        "pick": pick,
-        "outcome": outcome,
-        "correct_door": correct
-    })
-    session["last"] = {"pick": pick, "correct": correct, "outcome": outcome}
-
-    if outcome == "WIN":
-        session["wins"] += 1
-        session["round"] += 1
-        if session["wins"] >= 10:
-            session["banner"] = "🎉 You cleared all 10 rounds in a row!"
-            session["round"] = 11
-        return redirect(url_for("home"))
-    else:
-        start_new_attempt(reason="❌ Wrong guess. Run has been reset to Round 1.")
+    outcome, row, state = play_round(state, pick)
+    if not wants_json():
         return redirect(url_for("home"))
 
+    game_over = state.round > 10
+    return jsonify(
+        outcome=outcome,
+        pick=row["pick"],
+        correct=row["correct_door"],
+        row=row,
+        reset=outcome != "WIN",
+        round=state.round,
+        wins=state.wins,
+        attempts=state.attempts,
+        impossible=state.wins >= 5,
+        game_over=game_over,
+        progress_pct=(max(0, min(state.wins, 10)) / 10) * 100,
+        banner=session.get("banner", ""),
+    )
+
+# A sequence of picks in one request, for solvers and QA clients: each pick
+# is played exactly as POST /choose would play it (resets on a loss,
+# impossible mode after 5 wins), the session is written once at the end,
+# and each round comes back as [round, correct door, outcome]. Play stops
+# early if the run is cleared. Body: {"picks": ["life", "death", ...]}.
+@app.post("/choose/batch")
+def choose_batch():
+    body = request.get_json(silent=True)
+    picks = body.get("picks") if isinstance(body, dict) else body
+    if not isinstance(picks, list) or not all(isinstance(pick, str) for pick in picks):
+        return jsonify(error='expected {"picks": ["life" | "death", ...]}'), 400
+    if len(picks) > app.config["BATCH_MAX_PICKS"]:
+        return jsonify(error="too many picks", max_picks=app.config["BATCH_MAX_PICKS"]), 413
+
+    if "g" not in session:
+        reset_run()
+    state = load_state()
+    if state.round > 10:
+        return jsonify(error="game over"), 409
+
+    results = []
+    for pick in picks:
+        if state.round > 10:
+            break
+        outcome, row, state = play_round(state, pick)
+        results.append((row["round"], row["correct_door"], outcome))
+
+    return jsonify(
+        results=results,
+        played=len(results),
+        round=state.round,
+        wins=state.wins,
+        attempts=state.attempts,
+        impossible=state.wins >= 5,
+        game_over=state.round > 10,
+        banner=session.get("banner", ""),
+    )
+
 @app.route("/hard-reset")
 def hard_reset():
     reset_run()
-    session["attempts"] = 0
     session["requests_sent"] = False  # Reset the requests flag
     return redirect(url_for("home"))
 
+@app.get("/static/<filename>")
+def asset(filename):
+    if filename not in _asset_files:
+        abort(404)
+    resp = _asset_files[filename].response(request.accept_encodings)
+    resp.headers["Cache-Control"] = "public, max-age=%d, immutable" % app.config["ASSET_MAX_AGE"]
+    return resp
+
 # Beacon endpoints (204, no-store)
 @app.get("/QU9IRntMMWYzXzByX0QzNHRoXw")
 def QU9IRntMMWYzXzByX0QzNHRoXw():
@@ -1301,15 +903,126 @@ def VGgzX0c0bTNfMGZfQ2gwMWMzc180bmRf():
 def VGgzX0NoMDFjM19XNHNfTjN2M3JfWTB1cnN9():
     return _empty_204()
 
+# All three beacons in one request (inline first visit, via navigator.sendBeacon).
+# The body lists beacon paths, one per line; the routes above stay for the loader page.
+@app.post("/beacons")
+def beacons():
+    for path in request.get_data(as_text=True).split():
+        if path in BEACON_PATHS:
+            metrics_registry.inc("lod_batched_beacons_total", (("path", path),))
+    return _empty_204()
+
+
 
 
 
+@app.get("/leaderboard")
+def leaderboard_view():
+    top = [{"rank": i, "player": player_label(p), "best": best, "you": p == session.get("p")}
+           for i, (p, best) in enumerate(leaderboard.top(), 1)]
+    mine = leaderboard.rank(session["p"]) if "p" in session else None
+    you = {"rank": mine[0], "best": mine[1]} if mine else None
+    if wants_json() or request.args.get("format") == "json":
+        return jsonify(top=top, players=len(leaderboard), you=you)
+    return render_template(LEADERBOARD_TEMPLATE, top=top, players=len(leaderboard), you=you)
+
+# The spectator wall and its feed. The stream holds one server thread per
+# viewer and never touches the session.
+@app.get("/spectate")
+def spectate():
+    return render_template(SPECTATE_TEMPLATE)
+
+@app.get("/spectate/stream")
+def spectate_stream():
+    if len(spectators) >= app.config["SPECTATE_MAX_SUBSCRIBERS"]:
+        resp = make_response("Too many spectators, try again later.\n", 503)
+        resp.headers["Retry-After"] = "30"
+        return resp
+    resp = Response(spectators.stream(), mimetype="text/event-stream")
+    resp.headers["Cache-Control"] = "no-store"
+    resp.headers["X-Accel-Buffering"] = "no"  # tell nginx-style proxies not to buffer
+    return resp
+
+@app.get("/metrics")
+def metrics():
+    gauges = []
+    if isinstance(app.session_interface, ServerSideSessionInterface):
+        gauges.append(("lod_sessions_stored", (), len(app.session_interface.store)))
+    if event_log is not None:
+        gauges.append(("lod_event_log_dropped_total", (), event_log.dropped))
+    if app.config["RATE_LIMITS"]:
+        gauges.append(("lod_ratelimit_evictions_total", (), rate_table.evictions))
+    gauges.append(("lod_spectate_subscribers", (), len(spectators)))
+    gauges.append(("lod_spectate_delivered_total", (), spectators.delivered))
+    gauges.append(("lod_spectate_dropped_total", (), spectators.dropped))
+    resp = make_response(metrics_registry.render(gauges))
+    resp.headers["Content-Type"] = "text/plain; version=0.0.4; charset=utf-8"
+    resp.headers["Cache-Control"] = "no-store"
+    return resp
+
+# Read-only, like every GET of the game.
+@app.get("/fragment/<name>")
+def fragment(name):
+    if name not in FRAGMENT_INPUTS:
+        abort(404)
+    ctx = game_context(load_state(), session.get("banner", ""))
+    inputs = FRAGMENT_INPUTS[name](ctx)
+    return conditional_response(fragment_etag(name, inputs), lambda: render_fragment(name, ctx, inputs))
 
 # Debug state
 @app.route("/state")
 def state():
-    data = {k: v for k, v in session.items()}
-    return jsonify(data)
+    def render():
+        data = {k: v for k, v in session.items() if k != "g"}
+        data.update(load_state().as_dict())
+        return jsonify(data)
 
+    return conditional_response(page_etag("state", sorted(session.items())), render)
+
+# =========================
+# Warm-up
+# =========================
+# Pays the first-request costs at startup (in serve.py's master, so every
+# forked worker starts warm): URL map compilation, the session serializer,
+# rendering every template and fragment, JSON and compression. Nothing here
+# touches the event log, the leaderboard, rate-limit buckets or /metrics.
+def warm_up():
+    state = GameState()
+    with app.test_request_context("/", headers={"Accept-Encoding": "gzip"}):
+        url_for("home")
+        asset_url("game.css")
+        if rate_limiter is not None:
+            rate_limiter.route_table()
+        startup_phase("warm-up: request context, url map")
+
+        interface = app.session_interface
+        if hasattr(interface, "get_signing_serializer"):
+            serializer = interface.get_signing_serializer(app)
+        else:
+            serializer = interface.serializer
+        serializer.loads(serializer.dumps({"g": state.encode(), "banner": ""}))
+        startup_phase("warm-up: session serializer")
+
+        ctx = game_context(state)
+        ctx.update(beacons=None, low_power=False)
+        page = render_template(HOME_TEMPLATE, **ctx)
+        "".join(stream_game_page(dict(ctx)))
+        for name, inputs in FRAGMENT_INPUTS.items():
+            render_fragment(name, ctx, inputs(ctx))
+        render_template(LEADERBOARD_TEMPLATE, top=[], players=0, you=None)
+        render_template(SPECTATE_TEMPLATE)
+        startup_phase("warm-up: templates")
+
+        jsonify(state.as_dict())
+        _compress(make_response(page))
+        startup_phase("warm-up: json, compression")
+
+if app.config["WARMUP"]:
+    warm_up()
+app_ready.set()
+
+# Development server (debugger, reloader, one process). In production run serve.py.
 if __name__ == "__main__":
+    if app.config["LEADERBOARD_PATH"]:
+        start_snapshotter(leaderboard, app.config["LEADERBOARD_PATH"], app.config["LEADERBOARD_SNAPSHOT_INTERVAL"])
     app.run(debug=True, host="0.0.0.0", port=5000)
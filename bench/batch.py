@@ -0,0 +1,57 @@
+# bench/batch.py
+# Rounds per second for a client playing N rounds three ways, through the
+# full WSGI stack: the form post (POST /choose, the redirect and the game
+# page it leads to), POST /choose asking for JSON, and POST /choose/batch
+# with BATCH_MAX_PICKS picks per request.
+#
+#   python -m bench.batch [--rounds 5000]
+import argparse
+import os
+import random
+import time
+
+os.environ.update(LOD_RATE_LIMITS="{}", LOD_EVENT_LOG_DIR="null", LOD_LEADERBOARD_PATH="null")
+
+from app import app
+
+
+def _form(client, picks):
+    for pick in picks:
+        client.post("/choose", data={"door": pick}, follow_redirects=True)
+
+
+def _json(client, picks):
+    for pick in picks:
+        client.post("/choose", data={"door": pick}, headers={"Accept": "application/json"})
+
+
+def _batch(client, picks):
+    size = app.config["BATCH_MAX_PICKS"]
+    for i in range(0, len(picks), size):
+        resp = client.post("/choose/batch", json={"picks": picks[i:i + size]})
+        if resp.get_json()["game_over"]:
+            client.get("/hard-reset")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=5000)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    picks = [rng.choice(("life", "death")) for _ in range(args.rounds)]
+    print("%d rounds per client" % args.rounds)
+    print("%-28s %10s %12s" % ("", "rounds/s", "us / round"))
+    for label, play in (("form post + redirect + page", _form), ("POST /choose (JSON)", _json),
+                        ("POST /choose/batch", _batch)):
+        client = app.test_client()
+        client.get("/")
+        client.get("/")
+        t0 = time.perf_counter()
+        play(client, picks)
+        elapsed = time.perf_counter() - t0
+        print("%-28s %10.0f %12.1f" % (label, args.rounds / elapsed, elapsed / args.rounds * 1e6))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# bench/cold_start.py
+# Where a fresh process spends its cold start, with and without WARMUP:
+# importing Flask and friends, each startup phase recorded by app.py, and
+# then the first requests of a new player (loader, game page, a pick, the
+# game page again), each timed through the full WSGI stack. Every run is a
+# new interpreter, so nothing is shared between them.
+#
+#   python -m bench.cold_start [--runs 5]
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+_CHILD = r"""
+import json, time
+t0 = time.perf_counter()
+import flask, jinja2, werkzeug
+imported = time.perf_counter() - t0
+t0 = time.perf_counter()
+import app as m
+loaded = time.perf_counter() - t0
+client = m.app.test_client()
+requests = []
+for label, call in (
+    ("GET / (loader)", lambda: client.get("/")),
+    ("GET / (game)", lambda: client.get("/")),
+    ("POST /choose", lambda: client.post("/choose", data={"door": "life"}, headers={"Accept": "application/json"})),
+    ("GET / (again)", lambda: client.get("/")),
+):
+    t0 = time.perf_counter()
+    call()
+    requests.append((label, time.perf_counter() - t0))
+print(json.dumps({"imports": imported, "app": loaded, "phases": m.startup_timings, "requests": requests}))
+"""
+
+
+def _run(warmup):
+    env = dict(os.environ, LOD_WARMUP=json.dumps(warmup), LOD_RATE_LIMITS="{}",
+               LOD_EVENT_LOG_DIR="null", LOD_LEADERBOARD_PATH="null")
+    out = subprocess.run([sys.executable, "-c", _CHILD], env=env, capture_output=True, text=True,
+                         check=True, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5, help="fresh processes per mode")
+    args = parser.parse_args()
+
+    results = {warmup: [_run(warmup) for _ in range(args.runs)] for warmup in (False, True)}
+    med = lambda values: statistics.median(values) * 1000
+
+    print("median of %d fresh processes, ms" % args.runs)
+    print("%-36s %10s %10s" % ("", "no warm-up", "warm-up"))
+    rows = [("import flask, jinja2, werkzeug", lambda r: r["imports"]),
+            ("import app (total)", lambda r: r["app"])]
+    for i, (phase, _) in enumerate(results[True][0]["phases"]):
+        rows.append(("  " + phase, lambda r, i=i, phase=phase: dict(r["phases"]).get(phase, 0.0)))
+    for i, (label, _) in enumerate(results[True][0]["requests"]):
+        rows.append((label, lambda r, i=i: r["requests"][i][1]))
+    rows.append(("import app + first 4 requests", lambda r: r["app"] + sum(t for _, t in r["requests"])))
+    for label, get in rows:
+        print("%-36s %10.2f %10.2f" % (label, med([get(r) for r in results[False]]), med([get(r) for r in results[True]])))
+
+
+if __name__ == "__main__":
+    main()
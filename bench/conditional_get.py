@@ -0,0 +1,61 @@
+# bench/conditional_get.py
+# Full render vs. revalidation for the game page and /state: a plain GET
+# against one carrying the ETag from the previous response (answered 304
+# without rendering), with and without gzip.
+#
+#   python -m bench.conditional_get [-n 2000]
+import argparse
+import time
+
+from werkzeug.test import EnvironBuilder
+
+from app import app
+
+
+def _session_cookie():
+    # Two GETs: the first answers with the loader, the second starts a run.
+    client = app.test_client()
+    client.get("/")
+    client.get("/")
+    cookie = client.get_cookie(app.config["SESSION_COOKIE_NAME"])
+    return "%s=%s" % (cookie.key, cookie.value)
+
+
+def _request(environ):
+    seen = []
+    body = app.wsgi_app(environ, lambda status, headers, exc_info=None: seen.append((status, headers)))
+    size = 0
+    try:
+        for chunk in body:
+            size += len(chunk)
+    finally:
+        close = getattr(body, "close", None)
+        if close is not None:
+            close()
+    status, headers = seen[0]
+    return status[:3], dict(headers).get("ETag"), size
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", type=int, default=2000, help="requests per case")
+    args = parser.parse_args()
+
+    cookie = _session_cookie()
+    print("%-8s %-6s %-6s %10s %8s" % ("path", "gzip", "status", "us/req", "bytes"))
+    for path in ("/", "/state"):
+        for encoding in ("", "gzip"):
+            headers = {"Cookie": cookie, "Accept-Encoding": encoding}
+            _, etag, _ = _request(EnvironBuilder(path=path, headers=headers).get_environ())
+            for validator in (None, etag):
+                h = dict(headers, **({"If-None-Match": validator} if validator else {}))
+                environs = [EnvironBuilder(path=path, headers=h).get_environ() for _ in range(args.n)]
+                t0 = time.perf_counter()
+                for environ in environs:
+                    status, _, size = _request(environ)
+                per = (time.perf_counter() - t0) / args.n
+                print("%-8s %-6s %-6s %10.1f %8d" % (path, encoding or "-", status, per * 1e6, size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# bench/door_rng.py
+# Cost of drawing doors: the old per-request random.choice on the global
+# random module vs. one schedule per run from the doors.py sources, called
+# from one thread and from several at once (contention on the source lock).
+#
+#   python -m bench.door_rng [-n 200000] [--threads 8]
+import argparse
+import random
+import threading
+import time
+
+from doors import SeededSource, URandomPool, draw_schedule, scheduled_door
+
+
+def _per_call(fn, n):
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - t0) / n
+
+
+def _threaded(fn, n, threads):
+    per_thread = n // threads
+    barrier = threading.Barrier(threads + 1)
+
+    def work():
+        barrier.wait()
+        for _ in range(per_thread):
+            fn()
+
+    workers = [threading.Thread(target=work) for _ in range(threads)]
+    for t in workers:
+        t.start()
+    barrier.wait()
+    t0 = time.perf_counter()
+    for t in workers:
+        t.join()
+    return (time.perf_counter() - t0) / (per_thread * threads)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", type=int, default=200_000, help="draws per case")
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    pool, seeded = URandomPool(), SeededSource(42)
+    schedule = draw_schedule(pool)
+    cases = [
+        ("random.choice (old, per GET)", lambda: random.choice(["life", "death"])),
+        ("URandomPool schedule", lambda: draw_schedule(pool)),
+        ("SeededSource schedule", lambda: draw_schedule(seeded)),
+        ("scheduled_door lookup", lambda: scheduled_door(schedule, 3)),
+    ]
+    print("%-30s %14s %14s" % ("case", "1 thread ns", "%d threads ns" % args.threads))
+    for label, fn in cases:
+        print("%-30s %14.0f %14.0f" % (label, _per_call(fn, args.n) * 1e9, _threaded(fn, args.n, args.threads) * 1e9))
+
+    # The old code drew on every GET / (and every JSON choice); a schedule is
+    # drawn once per run and each round is a shift and a mask.
+    print("\nA run that wins 5 rounds with one refresh per round: 10 draws before, 1 schedule now.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+# bench/event_log.py
+# Request-path cost of EventLog.append (pack + deque append), the flush
+# thread's write throughput, and read-back speed over the mmapped segments.
+#
+#   python -m bench.event_log [-n 1000000]
+import argparse
+import tempfile
+import time
+
+from eventlog import RECORD_SIZE, EventLog, list_segments, read_records
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", type=int, default=1_000_000, help="records to append")
+    parser.add_argument("--segment-mb", type=int, default=8, help="segment size, MiB")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        log = EventLog(directory, segment_bytes=args.segment_mb << 20, buffer_records=args.n, flush_interval=0.05)
+        t0 = time.perf_counter()
+        for i in range(args.n):
+            log.append(0x1234567890ABCDEF, i >> 4, (i & 7) + 1, 1, 2, 0)
+        appended = time.perf_counter() - t0
+        log.close()
+        written = time.perf_counter() - t0
+
+        segments = list_segments(directory)
+        t0 = time.perf_counter()
+        count = sum(1 for path in segments for _ in read_records(path))
+        read = time.perf_counter() - t0
+
+    mib = args.n * RECORD_SIZE / (1 << 20)
+    print("append      %8.0f ns/record (request path)" % (appended / args.n * 1e9))
+    print("append+disk %8.2f s for %d records, %.1f MiB in %d segments, dropped %d" % (
+        written, args.n, mib, len(segments), log.dropped))
+    print("read back   %8.0f ns/record (%d records, struct over mmap)" % (read / max(count, 1) * 1e9, count))
+
+
+if __name__ == "__main__":
+    main()
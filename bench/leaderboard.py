@@ -0,0 +1,64 @@
+# bench/leaderboard.py
+# Leaderboard cost as the number of players grows: an improving update
+# (remove + insert in the skiplist), a rank lookup, a cached and an
+# uncached top-K read, plus snapshot write and reload.
+#
+#   python -m bench.leaderboard [--players 10000,100000,300000]
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from leaderboard import Leaderboard
+
+
+def _per_call(fn, n):
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - t0) / n
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--players", default="10000,100000,300000", help="comma-separated player counts")
+    parser.add_argument("-n", type=int, default=20000, help="operations per case")
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    print("%9s %12s %10s %12s %12s %12s %10s" % (
+        "players", "improve us", "rank us", "top hit us", "top miss us", "snapshot s", "load s"))
+    for players in [int(p) for p in args.players.split(",")]:
+        board = Leaderboard()
+        for player in range(players):
+            board.update(player, rng.randint(1, 4))
+
+        candidates = list(range(players))
+        rng.shuffle(candidates)
+        upgrades = iter(candidates * (args.n // players + 1))
+        improve = _per_call(lambda: board.update(next(upgrades), 5 + rng.randint(0, 5)), args.n)
+        rank = _per_call(lambda: board.rank(rng.randrange(players)), args.n)
+        top_hit = _per_call(board.top, args.n)
+
+        def top_miss():
+            board._top = None
+            board.top()
+
+        top_miss = _per_call(top_miss, args.n)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "leaderboard.bin")
+            t0 = time.perf_counter()
+            board.snapshot(path)
+            snapshot = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            Leaderboard().load(path)
+            load = time.perf_counter() - t0
+
+        print("%9d %12.1f %10.1f %12.2f %12.1f %12.2f %10.2f" % (
+            players, improve * 1e6, rank * 1e6, top_hit * 1e6, top_miss * 1e6, snapshot, load))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# bench/metrics_overhead.py
+# Cost of the request instrumentation: the per-request work MetricsMiddleware
+# adds around a trivial WSGI app, the raw recording calls, and recording
+# throughput as threads are added (recording is lock-free per thread).
+#
+#   python -m bench.metrics_overhead [-n 100000]
+import argparse
+import threading
+import time
+
+from metrics import LATENCY_BUCKETS, MetricsMiddleware, Registry
+
+
+def trivial_app(environ, start_response):
+    environ["lod.endpoint"] = "home"
+    start_response("200 OK", [("Content-Type", "text/plain"), ("Set-Cookie", "session=abc; Path=/")])
+    return [b"ok"]
+
+
+def drive(wsgi_app, n):
+    environ = {"REQUEST_METHOD": "GET", "PATH_INFO": "/"}
+    start_response = lambda status, headers, exc_info=None: None
+    t0 = time.perf_counter()
+    for _ in range(n):
+        body = wsgi_app(dict(environ), start_response)
+        for _chunk in body:
+            pass
+        close = getattr(body, "close", None)
+        if close is not None:
+            close()
+    return (time.perf_counter() - t0) / n * 1e6
+
+
+def threaded_observe(threads, n):
+    registry = Registry()
+    registry.histogram("h", "bench", LATENCY_BUCKETS)
+    labels = (("endpoint", "home"),)
+
+    def work():
+        for i in range(n):
+            registry.observe("h", labels, 0.001)
+
+    workers = [threading.Thread(target=work) for _ in range(threads)]
+    t0 = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - t0
+    count = registry.collect()[("h", labels)]
+    assert sum(count[:-1]) == threads * n
+    return threads * n / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", type=int, default=100000)
+    args = parser.parse_args()
+
+    bare = drive(trivial_app, args.n)
+    wrapped = drive(MetricsMiddleware(trivial_app, Registry()), args.n)
+    print("trivial WSGI app            %6.2f us/request" % bare)
+    print("with MetricsMiddleware      %6.2f us/request  (+%.2f us)" % (wrapped, wrapped - bare))
+
+    registry = Registry()
+    registry.counter("c", "bench")
+    registry.histogram("h", "bench", LATENCY_BUCKETS)
+    labels = (("endpoint", "home"),)
+    t0 = time.perf_counter()
+    for _ in range(args.n):
+        registry.inc("c", labels)
+    inc_us = (time.perf_counter() - t0) / args.n * 1e6
+    t0 = time.perf_counter()
+    for _ in range(args.n):
+        registry.observe("h", labels, 0.003)
+    observe_us = (time.perf_counter() - t0) / args.n * 1e6
+    print("Registry.inc                %6.2f us" % inc_us)
+    print("Registry.observe            %6.2f us" % observe_us)
+
+    print()
+    for threads in (1, 2, 4, 8):
+        rate = threaded_observe(threads, args.n // threads)
+        print("observe, %d thread(s)        %8.0f observations/s" % (threads, rate))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+# bench/minify.py
+# Bytes per response with and without MINIFY: the game page (rendered from
+# the raw and the minified template) and each static asset, as sent and
+# gzipped.
+#
+#   python -m bench.minify
+import os
+
+from compression import compress
+
+from app import app, HOME_TEMPLATE_SOURCE, game_context, load_state, reset_run
+from minify import MINIFIERS, minify_html
+
+
+def _row(name, before, after):
+    gz_before, gz_after = len(compress(before, "gzip", 9)), len(compress(after, "gzip", 9))
+    print("%-14s %8d %8d %6.1f%% %8d %8d %6.1f%%" % (
+        name, len(before), len(after), 100 * (1 - len(after) / len(before)),
+        gz_before, gz_after, 100 * (1 - gz_after / gz_before)))
+    return len(before), len(after), gz_before, gz_after
+
+
+def main():
+    print("%-14s %8s %8s %7s %8s %8s %7s" % ("response", "raw", "minified", "saved", "gzip", "gzip min", "saved"))
+    with app.test_request_context("/"):
+        reset_run()
+        ctx = game_context(load_state())
+        ctx.update(beacons=None, low_power=False)
+        pages = [app.jinja_env.from_string(source).render(**ctx)
+                 for source in (HOME_TEMPLATE_SOURCE, minify_html(HOME_TEMPLATE_SOURCE))]
+    totals = [_row("game page", *(page.encode("utf-8") for page in pages))]
+
+    static_dir = app.config["STATIC_DIR"]
+    for name in sorted(os.listdir(static_dir)):
+        ext = os.path.splitext(name)[1]
+        if ext not in MINIFIERS:
+            continue
+        with open(os.path.join(static_dir, name), "rb") as f:
+            body = f.read()
+        totals.append(_row(name, body, MINIFIERS[ext](body.decode("utf-8")).encode("utf-8")))
+
+    before, after, gz_before, gz_after = map(sum, zip(*totals))
+    print("%-14s %8d %8d %6.1f%% %8d %8d %6.1f%%" % (
+        "cold load", before, after, 100 * (1 - after / before),
+        gz_before, gz_after, 100 * (1 - gz_after / gz_before)))
+
+
+if __name__ == "__main__":
+    main()
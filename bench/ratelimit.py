@@ -0,0 +1,77 @@
+# bench/ratelimit.py
+# Cost of the rate limiter: a raw bucket check, a rejected POST /choose
+# (429 from the middleware) and an accepted one going through Flask, all
+# through the full WSGI stack with a real session cookie. Also how the
+# table behaves when far more clients show up than it has slots.
+#
+#   python -m bench.ratelimit [-n 5000]
+import argparse
+import os
+import time
+
+from werkzeug.test import EnvironBuilder
+
+# Keep the bench's made-up players out of the real event log and leaderboard.
+os.environ.update(LOD_EVENT_LOG_DIR="null", LOD_LEADERBOARD_PATH="null")
+
+from app import app
+from ratelimit import BucketTable
+
+
+def _session_cookie():
+    client = app.test_client()
+    client.get("/")
+    client.get("/")
+    cookie = client.get_cookie(app.config["SESSION_COOKIE_NAME"])
+    return "%s=%s" % (cookie.key, cookie.value)
+
+
+def _drive(environ_for, n):
+    statuses = {}
+    t0 = time.perf_counter()
+    for i in range(n):
+        seen = []
+        body = app.wsgi_app(environ_for(i), lambda status, headers, exc_info=None: seen.append(status))
+        for _chunk in body:
+            pass
+        getattr(body, "close", lambda: None)()
+        statuses[seen[0][:3]] = statuses.get(seen[0][:3], 0) + 1
+    return (time.perf_counter() - t0) / n, statuses
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", type=int, default=5000, help="requests per case")
+    args = parser.parse_args()
+
+    table = BucketTable(65536)
+    t0 = time.perf_counter()
+    for i in range(args.n * 20):
+        table.take(("choose", "10.0.%d.%d" % (i >> 8 & 255, i & 255)), 20.0, 60.0)
+    print("bucket check            %8.2f us" % ((time.perf_counter() - t0) / (args.n * 20) * 1e6))
+
+    cookie = _session_cookie()
+    form = {"door": "life"}
+
+    def one_client(i):
+        return EnvironBuilder(path="/choose", method="POST", data=form, headers={"Cookie": cookie},
+                              environ_base={"REMOTE_ADDR": "192.0.2.1"}).get_environ()
+
+    def many_clients(i):
+        return EnvironBuilder(path="/choose", method="POST", data=form, headers={"Cookie": cookie},
+                              environ_base={"REMOTE_ADDR": "10.%d.%d.%d" % (i >> 16 & 255, i >> 8 & 255, i & 255)}).get_environ()
+
+    _drive(one_client, 100)  # drain the bucket
+    per, statuses = _drive(one_client, args.n)
+    print("rejected POST /choose   %8.2f us  %s" % (per * 1e6, statuses))
+    per, statuses = _drive(many_clients, args.n)
+    print("accepted POST /choose   %8.2f us  %s" % (per * 1e6, statuses))
+
+    small = BucketTable(1024)
+    for i in range(100_000):
+        small.take(("choose", i), 20.0, 60.0)
+    print("100k clients, 1024 slots: %d evictions, %d slots in use" % (small.evictions, len(small)))
+
+
+if __name__ == "__main__":
+    main()
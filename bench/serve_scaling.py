@@ -0,0 +1,110 @@
+# bench/serve_scaling.py
+# Throughput of serve.py as workers are added. For each worker count a fresh
+# launcher is started on a free port, driven by loadgen players spread over
+# several client processes (one asyncio client saturates a core long before
+# the server does), and stopped with SIGTERM.
+#
+#   python -m bench.serve_scaling [--workers 1,2,4] [--clients 2] [--players 64] [--duration 10]
+#
+# Clients and workers share the machine, so leave cores for the clients: on
+# an N-core box, near-linear scaling shows up to roughly N minus --clients workers.
+import argparse
+import multiprocessing
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+import loadgen
+from serve import cpu_count
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_ready(url, timeout=15.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(url, timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("server at %s did not come up" % url)
+
+
+def _client(argv):
+    stats = loadgen.run(loadgen.parse_args(argv))
+    routes = stats.routes.values()
+    latencies = [x for r in routes for x in r.latencies]
+    return len(latencies), sum(r.errors for r in routes), latencies
+
+
+def _percentile(values, pct):
+    return loadgen._percentile(sorted(values), pct)
+
+
+def run_case(workers, args):
+    port = _free_port()
+    # All players come from 127.0.0.1, so per-IP rate limits would cap the run;
+    # the event log and leaderboard stay off so bench plays don't land in them.
+    env = dict(os.environ, LOD_SESSION_BACKEND="cookie", LOD_RATE_LIMITS="{}",
+               LOD_EVENT_LOG_DIR="null", LOD_LEADERBOARD_PATH="null")
+    server = subprocess.Popen(
+        [sys.executable, "serve.py", "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers)],
+        cwd=ROOT, env=env, stderr=subprocess.DEVNULL,
+    )
+    try:
+        url = "http://127.0.0.1:%d" % port
+        _wait_ready(url + "/")
+        argv = ["--url", url, "--players", str(max(1, args.players // args.clients)),
+                "--duration", str(args.duration), "--reset-prob", "0"]
+        with multiprocessing.Pool(args.clients) as pool:
+            results = pool.map(_client, [argv] * args.clients)
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait()
+    requests = sum(r[0] for r in results)
+    errors = sum(r[1] for r in results)
+    latencies = [x for r in results for x in r[2]]
+    return requests / args.duration, errors, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", default=None, help="comma-separated worker counts (default 1,2,4,... up to the CPU count)")
+    parser.add_argument("--clients", type=int, default=2, help="load generator processes")
+    parser.add_argument("--players", type=int, default=64, help="concurrent players across all clients")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per worker count")
+    args = parser.parse_args()
+
+    if args.workers:
+        counts = [int(n) for n in args.workers.split(",")]
+    else:
+        counts, n = [], 1
+        while n <= cpu_count():
+            counts.append(n)
+            n *= 2
+
+    print("%d CPUs, %d client processes, %d players, %.0fs per case" % (cpu_count(), args.clients, args.players, args.duration))
+    print("%-8s %10s %9s %9s %9s %7s" % ("workers", "req/s", "speedup", "p50 ms", "p99 ms", "errors"))
+    base = None
+    for workers in counts:
+        rate, errors, latencies = run_case(workers, args)
+        base = base or rate
+        print("%-8d %10.1f %8.2fx %9.2f %9.2f %7d" % (
+            workers, rate, rate / base if base else 0.0,
+            _percentile(latencies, 50) * 1000, _percentile(latencies, 99) * 1000, errors,
+        ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# bench/spectate.py
+# The spectator feed in one process: N subscribers consume Broadcaster.stream()
+# on their own threads (as the server would) while a publisher plays picks at
+# a fixed rate. Reports what a pick costs the request path, how long it takes
+# to reach a viewer, and what slow viewers lose.
+#
+#   python -m bench.spectate [--subscribers 2000] [--rate 2000] [--seconds 5] [--slow 0.0]
+import argparse
+import re
+import statistics
+import threading
+import time
+
+from spectate import Broadcaster
+
+_TS = re.compile(rb'"ts":(\d+)')
+
+
+def _consume(stream, latencies, sample, slow, stop):
+    for chunk in stream:
+        if sample:
+            now = time.time() * 1000
+            latencies.extend(now - int(ts) for ts in _TS.findall(chunk))
+        if stop.is_set():
+            break
+        if slow:
+            time.sleep(slow)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--subscribers", type=int, default=2000)
+    parser.add_argument("--rate", type=int, default=2000, help="picks per second")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--slow", type=float, default=0.0, help="seconds every 10th subscriber sleeps per chunk")
+    parser.add_argument("--buffer", type=int, default=256, help="frames queued per subscriber")
+    args = parser.parse_args()
+
+    threading.stack_size(256 * 1024)
+    broadcaster = Broadcaster(buffer_size=args.buffer, keepalive=1.0)
+    stop = threading.Event()
+    latencies = []
+    threads = []
+    for i in range(args.subscribers):
+        stream = broadcaster.stream()
+        next(stream)  # the retry hint; the subscription is open after this
+        t = threading.Thread(target=_consume, daemon=True,
+                             args=(stream, latencies, i % 100 == 0, args.slow if i % 10 == 5 else 0, stop))
+        t.start()
+        threads.append(t)
+
+    publish_cost = []
+    total = int(args.rate * args.seconds)
+    start = time.perf_counter()
+    for n in range(total):
+        t0 = time.perf_counter()
+        broadcaster.publish(n, 0, n % 10 + 1, "life", "death", n % 2 == 0, n % 10)
+        publish_cost.append(time.perf_counter() - t0)
+        delay = start + (n + 1) / args.rate - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+    time.sleep(0.5)
+    stop.set()
+    broadcaster.close()
+    for t in threads:
+        t.join(2)
+
+    publish_cost.sort()
+    latencies.sort()
+    expected = total * args.subscribers
+    print("%d subscribers, %d picks at %d/s" % (args.subscribers, total, args.rate))
+    print("publish()       p50 %6.2f us   p99 %6.2f us" % (
+        publish_cost[len(publish_cost) // 2] * 1e6, publish_cost[int(len(publish_cost) * 0.99)] * 1e6))
+    if latencies:
+        print("pick -> viewer  p50 %6.1f ms   p99 %6.1f ms   (sampled %d)" % (
+            statistics.median(latencies), latencies[int(len(latencies) * 0.99)], len(latencies)))
+    print("delivered %d of %d (%.2f%%), dropped for slow viewers %d" % (
+        broadcaster.delivered, expected, 100 * broadcaster.delivered / expected, broadcaster.dropped))
+
+
+if __name__ == "__main__":
+    main()
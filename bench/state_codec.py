@@ -0,0 +1,73 @@
+# bench/state_codec.py
+# Session cookie size and encode/decode time: the old list-of-dicts session
+# layout vs. the packed GameState integer, for runs of 0..10 rounds.
+#
+#   python -m bench.state_codec [-n 20000]
+import argparse
+import time
+
+from flask.sessions import SecureCookieSessionInterface
+
+from app import app
+from gamestate import GameState
+
+
+def legacy_session(rounds):
+    # The session as choose() used to leave it after `rounds` wins.
+    history = []
+    for i in range(rounds):
+        door = "life" if i % 2 else "death"
+        history.append({"round": i + 1, "pick": door, "outcome": "WIN", "correct_door": door})
+    last = {"pick": history[-1]["pick"], "correct": history[-1]["correct_door"], "outcome": "WIN"} if history else None
+    return {
+        "_permanent": True, "requests_sent": True, "correct_door": "life", "banner": "",
+        "attempts": 12, "round": rounds + 1, "wins": rounds, "history": history, "last": last,
+    }
+
+
+def packed_session(rounds):
+    state = GameState(attempts=12)
+    for i in range(rounds):
+        door = "life" if i % 2 else "death"
+        state.record(door, door)
+        state.wins += 1
+        state.round += 1
+    return {"_permanent": True, "requests_sent": True, "correct_door": "life", "banner": "", "g": state.encode()}
+
+
+def _per_op_us(fn, n):
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - t0) / n * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", type=int, default=20000, help="iterations per measurement")
+    args = parser.parse_args()
+
+    signer = SecureCookieSessionInterface().get_signing_serializer(app)
+    print("%6s | %14s %14s | %18s %18s" % ("rounds", "legacy bytes", "packed bytes", "legacy enc/dec us", "packed enc/dec us"))
+    for rounds in (0, 1, 5, 10):
+        legacy = legacy_session(rounds)
+        packed = packed_session(rounds)
+        legacy_cookie = signer.dumps(legacy)
+        packed_cookie = signer.dumps(packed)
+
+        # Full session round trip: sign + serialize, then verify + deserialize,
+        # plus the GameState encode/decode the packed layout adds.
+        legacy_enc = _per_op_us(lambda: signer.dumps(legacy), args.n)
+        legacy_dec = _per_op_us(lambda: signer.loads(legacy_cookie), args.n)
+        state = GameState.decode(packed["g"])
+        packed_enc = _per_op_us(lambda: signer.dumps(dict(packed, g=state.encode())), args.n)
+        packed_dec = _per_op_us(lambda: GameState.decode(signer.loads(packed_cookie)["g"]), args.n)
+
+        print("%6d | %14d %14d | %8.1f / %7.1f %8.1f / %7.1f" % (
+            rounds, len(legacy_cookie), len(packed_cookie),
+            legacy_enc, legacy_dec, packed_enc, packed_dec,
+        ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# bench/streaming.py
+# Buffered vs. streamed game page (STREAM_GAME_PAGE), measured at the WSGI
+# layer: time to the first body chunk (what the browser needs to start
+# fetching game.css), time to the last chunk, and peak Python memory per
+# request. Run with and without gzip since compression changes the chunking.
+#
+#   python -m bench.streaming [-n 500]
+import argparse
+import statistics
+import time
+import tracemalloc
+
+from werkzeug.test import EnvironBuilder
+
+from app import app
+
+
+def _session_cookie():
+    # Two GETs: the first answers with the loader, the second starts a run.
+    client = app.test_client()
+    client.get("/")
+    client.get("/")
+    cookie = client.get_cookie(app.config["SESSION_COOKIE_NAME"])
+    return "%s=%s" % (cookie.key, cookie.value)
+
+
+def _request(environ):
+    started = time.perf_counter()
+    first = None
+    size = 0
+    body = app.wsgi_app(environ, lambda status, headers, exc_info=None: None)
+    try:
+        for chunk in body:
+            if chunk and first is None:
+                first = time.perf_counter() - started
+            size += len(chunk)
+    finally:
+        close = getattr(body, "close", None)
+        if close is not None:
+            close()
+    return first, time.perf_counter() - started, size
+
+
+def _run(headers, n):
+    ttfb, total = [], []
+    for _ in range(n):
+        environ = EnvironBuilder(path="/", headers=headers).get_environ()
+        first, last, size = _request(environ)
+        ttfb.append(first)
+        total.append(last)
+
+    tracemalloc.start()
+    environ = EnvironBuilder(path="/", headers=headers).get_environ()
+    tracemalloc.reset_peak()
+    _request(environ)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return ttfb, total, size, peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", type=int, default=500, help="requests per case")
+    args = parser.parse_args()
+
+    cookie = _session_cookie()
+    print("%-22s %12s %12s %12s %10s %10s" % ("case", "ttfb p50 ms", "ttfb p95 ms", "total p50 ms", "body B", "peak KiB"))
+    for encoding in (None, "gzip"):
+        headers = {"Cookie": cookie}
+        if encoding:
+            headers["Accept-Encoding"] = encoding
+        for streamed in (False, True):
+            app.config["STREAM_GAME_PAGE"] = streamed
+            ttfb, total, size, peak = _run(headers, args.n)
+            ttfb.sort()
+            print("%-22s %12.3f %12.3f %12.3f %10d %10.1f" % (
+                "%s, %s" % ("streamed" if streamed else "buffered", encoding or "identity"),
+                statistics.median(ttfb) * 1000,
+                ttfb[int(len(ttfb) * 0.95) - 1] * 1000,
+                statistics.median(total) * 1000,
+                size,
+                peak / 1024.0,
+            ))
+
+
+if __name__ == "__main__":
+    main()
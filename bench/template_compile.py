@@ -0,0 +1,63 @@
+# bench/template_compile.py
+# Per-request cost of rendering the game page: compiling the template source on
+# every request (old render_template_string path) vs. reusing the precompiled
+# HOME_TEMPLATE, plus cold compile with and without the on-disk bytecode cache.
+#
+#   python -m bench.template_compile [-n 200]
+import argparse
+import statistics
+import tempfile
+import time
+
+from flask import render_template, render_template_string
+from jinja2 import DictLoader, Environment, FileSystemBytecodeCache
+
+from app import app, HOME_TEMPLATE, HOME_TEMPLATE_SOURCE, game_context, reset_run
+from gamestate import GameState
+
+
+def _time(fn, n):
+    samples = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return samples
+
+
+def _report(label, samples):
+    print("%-28s mean %8.3f ms   p50 %8.3f ms   min %8.3f ms" % (
+        label,
+        statistics.mean(samples) * 1000,
+        statistics.median(samples) * 1000,
+        min(samples) * 1000,
+    ))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", type=int, default=200, help="iterations per case")
+    args = parser.parse_args()
+
+    with app.test_request_context("/"):
+        reset_run()
+        ctx = game_context(GameState())
+        ctx.update(beacons=None, low_power=False)
+
+        print("Per-request render (n=%d)" % args.n)
+        _report("render_template_string", _time(lambda: render_template_string(HOME_TEMPLATE_SOURCE, **ctx), args.n))
+        _report("precompiled HOME_TEMPLATE", _time(lambda: render_template(HOME_TEMPLATE, **ctx), args.n))
+
+    # Cold start: a fresh environment compiling the template, as a new worker would.
+    loader = DictLoader({"home.html": HOME_TEMPLATE_SOURCE})
+    with tempfile.TemporaryDirectory() as cache_dir:
+        bcc = FileSystemBytecodeCache(cache_dir)
+        loader.load(Environment(bytecode_cache=bcc), "home.html")  # populate the cache
+
+        print("\nCold compile in a new Environment (n=%d)" % args.n)
+        _report("no bytecode cache", _time(lambda: loader.load(Environment(), "home.html"), args.n))
+        _report("FileSystemBytecodeCache", _time(lambda: loader.load(Environment(bytecode_cache=bcc), "home.html"), args.n))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# compression.py
+# gzip/deflate response compression: bodies that never change are compressed
+# once and served from memory, dynamic bodies are compressed per response
+# (incrementally when the response is streamed), and small bodies are sent as-is.
+import zlib
+
+from flask import make_response
+
+# Preference order when the client accepts several encodings equally.
+ENCODINGS = ("gzip", "deflate")
+
+# Only text-like bodies are worth the CPU.
+COMPRESSIBLE_TYPES = {
+    "text/html",
+    "text/css",
+    "text/javascript",
+    "application/javascript",
+    "application/json",
+    "image/svg+xml",
+}
+
+# zlib wbits: 16+15 writes a gzip container, 15 the zlib format HTTP calls "deflate".
+_WBITS = {"gzip": 31, "deflate": 15}
+
+
+def negotiate(accept_encodings):
+    """Pick an encoding from a werkzeug ``request.accept_encodings`` value."""
+    return accept_encodings.best_match(ENCODINGS)
+
+
+def compress(body, encoding, level=6):
+    c = zlib.compressobj(level, zlib.DEFLATED, _WBITS[encoding])
+    return c.compress(body) + c.flush()
+
+
+def compress_stream(chunks, encoding, level=6):
+    # Each chunk is sync-flushed so the client can decode it as soon as it
+    # arrives; a streamed page keeps its early flush points.
+    c = zlib.compressobj(level, zlib.DEFLATED, _WBITS[encoding])
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode("utf-8")
+            if not chunk:
+                continue
+            out = c.compress(chunk) + c.flush(zlib.Z_SYNC_FLUSH)
+            if out:
+                yield out
+        yield c.flush()
+    finally:
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
+
+
+class StaticBody:
+    """A response body that never changes, with every encoding computed up front."""
+
+    def __init__(self, body, mimetype, level=9):
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        self.mimetype = mimetype
+        self.variants = {None: body}
+        if mimetype in COMPRESSIBLE_TYPES:
+            for encoding in ENCODINGS:
+                compressed = compress(body, encoding, level)
+                if len(compressed) < len(body):
+                    self.variants[encoding] = compressed
+
+    def response(self, accept_encodings):
+        encoding = negotiate(accept_encodings)
+        body = self.variants.get(encoding)
+        if body is None:
+            encoding, body = None, self.variants[None]
+        resp = make_response(body)
+        resp.mimetype = self.mimetype
+        if len(self.variants) > 1:
+            resp.vary.add("Accept-Encoding")
+        if encoding:
+            resp.headers["Content-Encoding"] = encoding
+        return resp
+
+
+def compress_response(resp, accept_encodings, min_size=1024, level=6):
+    if resp.status_code < 200 or resp.status_code in (204, 304):
+        return resp
+    if "Content-Encoding" in resp.headers or resp.direct_passthrough:
+        return resp
+    if resp.mimetype not in COMPRESSIBLE_TYPES:
+        return resp
+    if not resp.is_streamed and resp.calculate_content_length() < min_size:
+        return resp
+
+    resp.vary.add("Accept-Encoding")
+    encoding = negotiate(accept_encodings)
+    if encoding is None:
+        return resp
+
+    if resp.is_streamed:
+        resp.response = compress_stream(resp.response, encoding, level)
+        resp.headers.pop("Content-Length", None)
+    else:
+        resp.set_data(compress(resp.get_data(), encoding, level))
+    resp.headers["Content-Encoding"] = encoding
+    return resp
@@ -0,0 +1,67 @@
+# doors.py
+# Door engine. A run's correct doors are drawn all at once when the run
+# starts: one bit per round (0 = life, 1 = death), so the session holds a
+# single small integer and nothing is re-rolled when the page is refreshed.
+#
+# Entropy comes from a pluggable source with one method, bits(n):
+#   URandomPool  os.urandom bytes fetched in bulk, handed out 16 bits at a time
+#   SeededSource random.Random(seed), for reproducible load tests
+import os
+import random
+import threading
+from array import array
+
+from gamestate import DOORS, MAX_ROUNDS
+
+SCHEDULE_BITS = MAX_ROUNDS
+
+
+class URandomPool:
+    # Draws up to 16 bits. list.pop() is atomic, so the common path takes no
+    # lock; the lock only keeps two threads from refilling at once.
+    def __init__(self, pool_bytes=4096):
+        self.pool_bytes = pool_bytes
+        self._lock = threading.Lock()
+        self._values = []
+        # A forked worker must not hand out the same values as its siblings.
+        os.register_at_fork(after_in_child=self._discard)
+
+    def _discard(self):
+        self._lock = threading.Lock()
+        self._values = []
+
+    def bits(self, n):
+        while True:
+            try:
+                return self._values.pop() & ((1 << n) - 1)
+            except IndexError:
+                with self._lock:
+                    if not self._values:
+                        self._values = array("H", os.urandom(self.pool_bytes)).tolist()
+
+
+class SeededSource:
+    # Same seed, same sequence of schedules (per process: forked workers
+    # each replay it from the start). getrandbits() runs under the GIL, so
+    # no lock is needed.
+    def __init__(self, seed):
+        self._rng = random.Random(seed)
+
+    def bits(self, n):
+        return self._rng.getrandbits(n)
+
+
+def create_source(app):
+    seed = app.config["DOOR_SEED"]
+    if seed is not None:
+        return SeededSource(seed)
+    return URandomPool(app.config["DOOR_POOL_BYTES"])
+
+
+def draw_schedule(source):
+    return source.bits(SCHEDULE_BITS)
+
+
+def scheduled_door(schedule, round):
+    # round is 1-based
+    return DOORS[1 + (schedule >> (round - 1) & 1)]
@@ -0,0 +1,152 @@
+# eventlog.py
+# Append-only binary log of every evaluated choice.
+#
+# Each record is RECORD_SIZE bytes, little-endian, no header or framing:
+#   ts       u64  time.time_ns() when the choice was evaluated
+#   player   u64  random per-player ID kept in the session (survives resets)
+#   attempt  u32
+#   round    u8   1..10
+#   pick     u8   door code, 0 = none, 1 = life, 2 = death (gamestate.DOORS)
+#   correct  u8   door code; 0 in impossible mode
+#   outcome  u8   1 = win, 0 = loss
+#
+# The request path only packs the record and appends it to an in-memory ring
+# buffer (a bounded deque, so a stalled disk drops the oldest records instead
+# of blocking requests). A background thread drains the buffer in batches and
+# appends them to the current segment, rolling over to a new segment past
+# segment_bytes. Segments are named events-<first ns>-<pid>.log, so each
+# serve.py worker writes its own files and sorting by name is time order.
+#
+# Segments are plain arrays of records: readers mmap them (see open_segment)
+# and can treat them as columns, e.g. numpy.frombuffer(mm, dtype=NUMPY_DTYPE).
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import deque
+
+RECORD = struct.Struct("<QQIBBBB")
+RECORD_SIZE = RECORD.size
+FIELDS = ("ts", "player", "attempt", "round", "pick", "correct", "outcome")
+NUMPY_DTYPE = [("ts", "<u8"), ("player", "<u8"), ("attempt", "<u4"), ("round", "u1"),
+               ("pick", "u1"), ("correct", "u1"), ("outcome", "u1")]
+
+SEGMENT_PREFIX = "events-"
+SEGMENT_SUFFIX = ".log"
+
+
+class EventLog:
+    def __init__(self, directory, segment_bytes=64 << 20, buffer_records=65536, flush_interval=1.0):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._buffer = deque(maxlen=buffer_records)
+        self._wake = threading.Event()
+        self._closed = False
+        self._file = None
+        self._file_size = 0
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        # The flush thread and open segment belong to the process that
+        # started them; a forked worker starts its own on first use.
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        self._buffer.clear()
+        self._wake = threading.Event()
+        self._file = None
+        self._file_size = 0
+        self._thread = None
+        self._thread_lock = threading.Lock()
+
+    # ---- request path ----
+    def append(self, player, attempt, round, pick, correct, won):
+        if self._thread is None:
+            self._start()
+        buf = self._buffer
+        if len(buf) == buf.maxlen:
+            self.dropped += 1
+        buf.append(RECORD.pack(time.time_ns(), player, attempt, round, pick, correct, won))
+
+    # ---- background writer ----
+    def _start(self):
+        with self._thread_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="event-log-flush", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        # Only the flush thread (or close(), once it has stopped) calls this.
+        buf = self._buffer
+        records = []
+        while True:
+            try:
+                records.append(buf.popleft())
+            except IndexError:
+                break
+        if not records:
+            return
+        data = b"".join(records)
+        if self._file is None or self._file_size + len(data) > self.segment_bytes:
+            self._rotate()
+        self._file.write(data)
+        self._file.flush()
+        self._file_size += len(data)
+
+    def _rotate(self):
+        if self._file is not None:
+            os.fsync(self._file.fileno())
+            self._file.close()
+        os.makedirs(self.directory, exist_ok=True)  # not before the first record
+        name = "%s%020d-%d%s" % (SEGMENT_PREFIX, time.time_ns(), os.getpid(), SEGMENT_SUFFIX)
+        self._file = open(os.path.join(self.directory, name), "ab")
+        self._file_size = 0
+
+    def close(self):
+        self._closed = True
+        thread = self._thread
+        if thread is not None:
+            self._wake.set()
+            thread.join()
+        self.flush()
+        if self._file is not None:
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+
+
+# =========================
+# Readers
+# =========================
+def list_segments(directory):
+    names = [n for n in os.listdir(directory) if n.startswith(SEGMENT_PREFIX) and n.endswith(SEGMENT_SUFFIX)]
+    return [os.path.join(directory, n) for n in sorted(names)]
+
+
+def open_segment(path):
+    # Read-only mmap of the complete records in a segment, or None if it has
+    # none yet. A segment still being written may end in a partial record,
+    # which is left out.
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        size -= size % RECORD_SIZE
+        if not size:
+            return None
+        return mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+
+
+def read_records(path):
+    mm = open_segment(path)
+    if mm is None:
+        return
+    with mm:
+        for offset in range(0, len(mm), RECORD_SIZE):
+            yield RECORD.unpack_from(mm, offset)
@@ -0,0 +1,83 @@
+# fonts.py
+# Self-hosted webfonts. Instead of @import-ing Orbitron and Rajdhani from
+# fonts.googleapis.com (render-blocking, and it hangs on offline kiosks), the
+# app serves WOFF2 files from STATIC_DIR, subset to the characters its pages
+# can show, preloads the ones above the fold and declares them with
+# font-display: swap.
+#
+# Build the files from the families' TTFs (SIL OFL, github.com/google/fonts)
+# with fontTools (pip install fonttools brotli):
+#
+#   python fonts.py --src path/to/ttfs [--out static]
+#
+# At startup the app only declares families whose files are all present;
+# otherwise the CSS font stacks fall back to system fonts.
+import argparse
+import os
+import string
+from collections import namedtuple
+
+FontFace = namedtuple("FontFace", "family weight source file preload")
+
+FONT_FACES = (
+    # source is the TTF in --src; Orbitron ships as a variable font and is pinned per weight.
+    FontFace("Orbitron", 900, "Orbitron[wght].ttf", "orbitron-900.woff2", True),  # title, result message
+    FontFace("Orbitron", 700, "Orbitron[wght].ttf", "orbitron-700.woff2", False),  # door labels
+    FontFace("Rajdhani", 400, "Rajdhani-Regular.ttf", "rajdhani-400.woff2", True),  # body text
+    FontFace("Rajdhani", 600, "Rajdhani-SemiBold.ttf", "rajdhani-600.woff2", False),  # pills, buttons
+    FontFace("Rajdhani", 700, "Rajdhani-Bold.ttf", "rajdhani-700.woff2", False),  # <b>, outcomes
+)
+
+# Text the pages can show comes from these files (plus whatever players'
+# labels and numbers need, which is printable ASCII).
+_TEXT_SOURCES = ("app.py", os.path.join("static", "game.js"))
+
+
+def available_faces(asset_names):
+    # Faces to declare, and the files that are missing. A family is declared
+    # only if every weight is present, so browsers never fake a bold.
+    missing = [face.file for face in FONT_FACES if face.file not in asset_names]
+    broken = {face.family for face in FONT_FACES if face.file in missing}
+    return [face for face in FONT_FACES if face.family not in broken], missing
+
+
+def subset_text(root):
+    chars = set(string.printable)
+    for name in _TEXT_SOURCES:
+        with open(os.path.join(root, name), encoding="utf-8") as f:
+            chars.update(f.read())
+    return "".join(sorted(c for c in chars if c.isprintable()))
+
+
+def main():
+    from fontTools import subset
+    from fontTools.ttLib import TTFont
+    from fontTools.varLib import instancer
+
+    root = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Subset the game's webfonts to WOFF2.")
+    parser.add_argument("--src", required=True, help="directory holding the source TTFs")
+    parser.add_argument("--out", default=os.path.join(root, "static"), help="where to write the WOFF2 files")
+    args = parser.parse_args()
+
+    options = subset.Options()
+    options.flavor = "woff2"
+    options.layout_features = ["kern", "liga"]
+    options.name_IDs = [0, 1, 2]  # copyright, family, subfamily (the OFL asks to keep the notice)
+    options.notdef_outline = True
+    text = subset_text(root)
+
+    for face in FONT_FACES:
+        font = TTFont(os.path.join(args.src, face.source))
+        if "fvar" in font:
+            font = instancer.instantiateVariableFont(font, {"wght": face.weight})
+        subsetter = subset.Subsetter(options)
+        subsetter.populate(text=text)
+        subsetter.subset(font)
+        path = os.path.join(args.out, face.file)
+        subset.save_font(font, path, options)
+        print("%-22s %7d bytes" % (face.file, os.path.getsize(path)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# gamestate.py
+# Compact codec for a player's run. The whole run (round, wins, attempts,
+# the per-round history and the last outcome) packs into one integer, which
+# is what the session stores instead of a list of string-keyed dicts.
+#
+# Bit layout, least significant first:
+#   0-3    round (1..11)
+#   4-7    wins (0..10)
+#   8-11   number of history entries (0..10)
+#   12-51  history, 4 bits per round: pick (2 bits) | correct door (2 bits) << 2
+#   52-56  last outcome: present (1 bit) | pick << 1 | correct door << 3
+#   57-    attempts (unbounded)
+#
+# Doors are coded 0 = none, 1 = life, 2 = death. A round's round number is its
+# position in the history and its outcome follows from pick and correct door,
+# so neither is stored.
+
+DOORS = (None, "life", "death")
+_DOOR_CODES = {"life": 1, "death": 2}
+
+MAX_ROUNDS = 10
+_HISTORY_SHIFT = 12
+_LAST_SHIFT = _HISTORY_SHIFT + 4 * MAX_ROUNDS
+_ATTEMPTS_SHIFT = _LAST_SHIFT + 5
+
+
+def door_code(door):
+    # Anything that isn't a real door (missing or tampered form field) is "none".
+    return _DOOR_CODES.get(door, 0)
+
+
+def outcome(pick, correct):
+    return "WIN" if correct and pick == correct else "LOSS"
+
+
+class GameState:
+    __slots__ = ("round", "wins", "attempts", "history", "last")
+
+    def __init__(self, round=1, wins=0, attempts=0, history=None, last=None):
+        self.round = round
+        self.wins = wins
+        self.attempts = attempts
+        self.history = history if history is not None else []  # [(pick code, correct code), ...]
+        self.last = last  # (pick code, correct code) or None
+
+    def encode(self):
+        value = self.round | self.wins << 4 | len(self.history) << 8
+        for i, (pick, correct) in enumerate(self.history):
+            value |= (pick | correct << 2) << (_HISTORY_SHIFT + 4 * i)
+        if self.last is not None:
+            value |= (1 | self.last[0] << 1 | self.last[1] << 3) << _LAST_SHIFT
+        return value | self.attempts << _ATTEMPTS_SHIFT
+
+    @classmethod
+    def decode(cls, value):
+        n = value >> 8 & 0xF
+        history = []
+        for i in range(n):
+            bits = value >> (_HISTORY_SHIFT + 4 * i) & 0xF
+            history.append((bits & 3, bits >> 2))
+        bits = value >> _LAST_SHIFT & 0x1F
+        last = (bits >> 1 & 3, bits >> 3) if bits & 1 else None
+        return cls(
+            round=value & 0xF,
+            wins=value >> 4 & 0xF,
+            attempts=value >> _ATTEMPTS_SHIFT,
+            history=history,
+            last=last,
+        )
+
+    def record(self, pick, correct):
+        entry = (door_code(pick), door_code(correct))
+        self.history.append(entry)
+        self.last = entry
+        return outcome(*map(DOORS.__getitem__, entry))
+
+    # Readable views for templates, JSON and the debug route.
+    def history_rows(self):
+        rows = []
+        for i, (pick, correct) in enumerate(self.history):
+            rows.append({
+                "round": i + 1,
+                "pick": DOORS[pick],
+                "outcome": outcome(DOORS[pick], DOORS[correct]),
+                "correct_door": DOORS[correct],
+            })
+        return rows
+
+    def last_outcome(self):
+        if self.last is None:
+            return None
+        pick, correct = DOORS[self.last[0]], DOORS[self.last[1]]
+        return {"pick": pick, "correct": correct, "outcome": outcome(pick, correct)}
+
+    def as_dict(self):
+        return {
+            "round": self.round,
+            "wins": self.wins,
+            "attempts": self.attempts,
+            "history": self.history_rows(),
+            "last": self.last_outcome(),
+        }
@@ -0,0 +1,28 @@
+# health.py
+# Probe endpoints for load balancers and orchestrators, answered in front of
+# everything else: no session, no routing, no rate limiting, no metrics.
+#   /healthz  liveness: 200 whenever the process can answer at all
+#   /readyz   readiness: 200 once the app has warmed up, 503 before that and
+#             while a serve.py worker is draining
+_HEADERS = [("Content-Type", "text/plain; charset=utf-8"), ("Cache-Control", "no-store")]
+
+
+class HealthMiddleware:
+    def __init__(self, wsgi_app, ready):
+        self.wsgi_app = wsgi_app
+        self.ready = ready  # threading.Event
+
+    def __call__(self, environ, start_response):
+        path = environ.get("PATH_INFO")
+        if path == "/healthz":
+            return _reply(start_response, "200 OK", b"ok\n")
+        if path == "/readyz":
+            if self.ready.is_set():
+                return _reply(start_response, "200 OK", b"ready\n")
+            return _reply(start_response, "503 Service Unavailable", b"not ready\n")
+        return self.wsgi_app(environ, start_response)
+
+
+def _reply(start_response, status, body):
+    start_response(status, _HEADERS + [("Content-Length", str(len(body)))])
+    return [body]
@@ -0,0 +1,285 @@
+# leaderboard.py
+# Best-streak leaderboard across players.
+#
+# Entries are ordered by (-best, reached_at, player): higher streak first,
+# and on a tie whoever got there first. They live in an indexable skiplist,
+# so an improvement (remove + insert), a player's rank and the top K are all
+# O(log n). The top K is cached and only rebuilt when a change lands in it.
+#
+# Snapshots are a flat binary file in rank order (see SNAPSHOT_RECORD), written
+# to a temp file and moved into place with os.replace(), so a reader never
+# sees a half-written file. Loading one is a linear bulk build of the skiplist.
+# Each serve.py worker keeps its own leaderboard; snapshot() first merges the
+# file on disk (under an flock), so workers converge every snapshot interval
+# and none overwrites another's entries.
+import fcntl
+import gc
+import hashlib
+import os
+import random
+import struct
+import threading
+import time
+
+MAX_LEVEL = 24  # plenty for millions of entries at p = 1/2
+SNAPSHOT_MAGIC = b"LODLB\x00\x00\x01"
+SNAPSHOT_RECORD = struct.Struct("<QQB")  # player, reached_at (ns), best
+
+
+# =========================
+# Indexable skiplist
+# =========================
+# Each link also stores its width, the number of level-0 steps it skips;
+# summing widths along a search path gives a node's 1-based position.
+class _Node:
+    __slots__ = ("key", "next", "width")
+
+    def __init__(self, key, level):
+        self.key = key
+        self.next = [None] * level
+        self.width = [1] * level
+
+
+class IndexableSkiplist:
+    def __init__(self, seed=None):
+        self.head = _Node(None, MAX_LEVEL)
+        self.size = 0
+        self._random = random.Random(seed)
+
+    def __len__(self):
+        return self.size
+
+    def _level(self):
+        # 1 + the number of trailing one bits: level L with probability 2**-L
+        bits = self._random.getrandbits(MAX_LEVEL - 1)
+        return (bits ^ (bits + 1)).bit_length()
+
+    def _path(self, key):
+        chain = [None] * MAX_LEVEL
+        steps = [0] * MAX_LEVEL
+        node = self.head
+        for lvl in range(MAX_LEVEL - 1, -1, -1):
+            nxt = node.next[lvl]
+            while nxt is not None and nxt.key < key:
+                steps[lvl] += node.width[lvl]
+                node = nxt
+                nxt = node.next[lvl]
+            chain[lvl] = node
+        return chain, steps
+
+    def insert(self, key):
+        chain, steps = self._path(key)
+        level = self._level()
+        node = _Node(key, level)
+        skipped = 0
+        for lvl in range(level):
+            prev = chain[lvl]
+            node.next[lvl] = prev.next[lvl]
+            prev.next[lvl] = node
+            node.width[lvl] = prev.width[lvl] - skipped
+            prev.width[lvl] = skipped + 1
+            skipped += steps[lvl]
+        for lvl in range(level, MAX_LEVEL):
+            chain[lvl].width[lvl] += 1
+        self.size += 1
+
+    def remove(self, key):
+        chain, _ = self._path(key)
+        node = chain[0].next[0]
+        if node is None or node.key != key:
+            raise KeyError(key)
+        for lvl in range(len(node.next)):
+            prev = chain[lvl]
+            prev.width[lvl] += node.width[lvl] - 1
+            prev.next[lvl] = node.next[lvl]
+        for lvl in range(len(node.next), MAX_LEVEL):
+            chain[lvl].width[lvl] -= 1
+        self.size -= 1
+
+    def rank(self, key):
+        # 1-based position of key, or None
+        node = self.head
+        pos = 0
+        for lvl in range(MAX_LEVEL - 1, -1, -1):
+            nxt = node.next[lvl]
+            while nxt is not None and nxt.key <= key:
+                pos += node.width[lvl]
+                node = nxt
+                nxt = node.next[lvl]
+        return pos if node is not self.head and node.key == key else None
+
+    def __getitem__(self, i):
+        # 0-based
+        if not 0 <= i < self.size:
+            raise IndexError(i)
+        node = self.head
+        i += 1
+        for lvl in range(MAX_LEVEL - 1, -1, -1):
+            while node.next[lvl] is not None and node.width[lvl] <= i:
+                i -= node.width[lvl]
+                node = node.next[lvl]
+        return node.key
+
+    def __iter__(self):
+        node = self.head.next[0]
+        while node is not None:
+            yield node.key
+            node = node.next[0]
+
+    def head_keys(self, k):
+        keys = []
+        node = self.head.next[0]
+        while node is not None and len(keys) < k:
+            keys.append(node.key)
+            node = node.next[0]
+        return keys
+
+    def bulk_load(self, keys):
+        # keys must be sorted; builds every level in one pass.
+        last = [self.head] * MAX_LEVEL
+        last_pos = [0] * MAX_LEVEL
+        pos = 0
+        for key in keys:
+            pos += 1
+            node = _Node(key, self._level())
+            for lvl in range(len(node.next)):
+                last[lvl].next[lvl] = node
+                last[lvl].width[lvl] = pos - last_pos[lvl]
+                last[lvl] = node
+                last_pos[lvl] = pos
+        for lvl in range(MAX_LEVEL):
+            last[lvl].next[lvl] = None
+            last[lvl].width[lvl] = pos + 1 - last_pos[lvl]
+        self.size = pos
+
+
+# =========================
+# Leaderboard
+# =========================
+class Leaderboard:
+    def __init__(self, top_k=10):
+        self.top_k = top_k
+        self.version = 0  # bumped whenever the top K changes
+        self._lock = threading.Lock()
+        self._list = IndexableSkiplist()
+        self._entries = {}  # player -> (best, reached_at)
+        self._top = None
+        self._dirty = False
+        # A fork can land while another thread holds the lock (serve.py forks
+        # workers after import); the child starts with a fresh one.
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def update(self, player, best, reached_at=None):
+        # Returns True if this is a new best for the player.
+        entry = self._entries.get(player)
+        if best <= 0 or (entry is not None and entry[0] >= best):
+            return False  # the common case: no lock taken
+        with self._lock:
+            entry = self._entries.get(player)
+            if entry is not None:
+                if entry[0] >= best:
+                    return False
+                self._list.remove((-entry[0], entry[1], player))
+            if reached_at is None:
+                reached_at = time.time_ns()
+            key = (-best, reached_at, player)
+            self._list.insert(key)
+            self._entries[player] = (best, reached_at)
+            self._dirty = True
+            if self._list.rank(key) <= self.top_k:
+                self._top = None
+                self.version += 1
+        return True
+
+    def top(self):
+        top = self._top
+        if top is None:
+            with self._lock:
+                top = self._top = tuple(
+                    (player, -neg_best) for neg_best, _, player in self._list.head_keys(self.top_k)
+                )
+        return top
+
+    def rank(self, player):
+        # (rank, best) or None
+        with self._lock:
+            entry = self._entries.get(player)
+            if entry is None:
+                return None
+            return self._list.rank((-entry[0], entry[1], player)), entry[0]
+
+    # ---- persistence ----
+    def load(self, path):
+        entries = read_snapshot(path)
+        # A big snapshot allocates hundreds of thousands of objects at once;
+        # the cyclic GC would run full passes over them to find nothing.
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            skiplist = IndexableSkiplist()
+            skiplist.bulk_load((-best, reached_at, player) for player, reached_at, best in entries)
+            by_player = {player: (best, reached_at) for player, reached_at, best in entries}
+        finally:
+            if gc_enabled:
+                gc.enable()
+        with self._lock:
+            self._list = skiplist
+            self._entries = by_player
+            self._top = None
+            self.version += 1
+
+    def snapshot(self, path):
+        # Nothing new since the last snapshot: no file is written (or created).
+        if not self._dirty:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path + ".lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            # Pick up what other workers wrote since our last snapshot.
+            for player, reached_at, best in read_snapshot(path):
+                self.update(player, best, reached_at)
+            with self._lock:
+                entries = [(player, reached_at, -neg_best) for neg_best, reached_at, player in self._list]
+                self._dirty = False
+            tmp = "%s.%d.tmp" % (path, os.getpid())
+            with open(tmp, "wb") as f:
+                f.write(SNAPSHOT_MAGIC)
+                f.write(b"".join(SNAPSHOT_RECORD.pack(*e) for e in entries))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+
+
+def player_label(player):
+    # Short public name for a player; the ID itself stays private.
+    return "#" + hashlib.blake2b(player.to_bytes(8, "little"), digest_size=3).hexdigest()
+
+
+def read_snapshot(path):
+    # [(player, reached_at, best), ...] in rank order; [] if there is no snapshot.
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return []
+    if not data.startswith(SNAPSHOT_MAGIC):
+        raise ValueError("%s is not a leaderboard snapshot" % path)
+    body = memoryview(data)[len(SNAPSHOT_MAGIC):]
+    return list(SNAPSHOT_RECORD.iter_unpack(body[:len(body) - len(body) % SNAPSHOT_RECORD.size]))
+
+
+def start_snapshotter(leaderboard, path, interval):
+    def run():
+        while True:
+            time.sleep(interval)
+            leaderboard.snapshot(path)
+
+    thread = threading.Thread(target=run, name="leaderboard-snapshot", daemon=True)
+    thread.start()
+    return thread
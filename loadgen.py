@@ -0,0 +1,348 @@
+# loadgen.py
+# Load generator for a running instance. Every simulated player has its own
+# keep-alive connection and cookie jar and follows the real funnel:
+#
+#   GET /  (loader)  ->  3 beacon GETs  ->  GET /  (game)
+#   (with --first-visit inline: GET /  (game)  ->  one POST /beacons)
+#   -> POST /choose, follow the redirect to GET /  (repeated)
+#   -> now and then GET /hard-reset, which starts the funnel over
+#
+# Closed loop (default): --players players are started evenly over --ramp
+# seconds and play until --duration is up.
+# Open loop: --rate new players arrive per second regardless of how fast the
+# server answers; each plays --choices rounds and leaves.
+#
+#   python loadgen.py --url http://127.0.0.1:5000 --players 100 --ramp 10 --duration 60
+#   python loadgen.py --url http://127.0.0.1:5000 --rate 50 --duration 60
+#
+# Every player connects from the same address, so start the server with
+# LOD_RATE_LIMITS='{}' (or limits sized for it) unless the rate limiter itself
+# is under test; rejected requests count as errors.
+#
+# Only the standard library is used (asyncio streams, hand-written HTTP/1.1).
+import argparse
+import asyncio
+import random
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+BEACONS = (
+    "/QU9IRntMMWYzXzByX0QzNHRoXw",
+    "/VGgzX0c0bTNfMGZfQ2gwMWMzc180bmRf",
+    "/VGgzX0NoMDFjM19XNHNfTjN2M3JfWTB1cnN9",
+)
+
+# route label -> status the app answers with when things are fine
+EXPECTED_STATUS = {"loader": 200, "beacon": 204, "beacons": 204, "home": 200, "choose": 302, "hard-reset": 302}
+
+
+class HTTPError(Exception):
+    pass
+
+
+# =========================
+# Stats
+# =========================
+class RouteStats:
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+        self.set_cookie_bytes = 0
+        self.bytes_in = 0
+
+
+class Stats:
+    def __init__(self):
+        self.routes = defaultdict(RouteStats)
+        self.players_started = 0
+        self.players_finished = 0
+        self.started = time.perf_counter()
+
+    def record(self, label, latency, ok, set_cookie_bytes=0, bytes_in=0):
+        route = self.routes[label]
+        route.latencies.append(latency)
+        route.set_cookie_bytes += set_cookie_bytes
+        route.bytes_in += bytes_in
+        if not ok:
+            route.errors += 1
+
+    def report(self):
+        elapsed = time.perf_counter() - self.started
+        total = sum(len(r.latencies) for r in self.routes.values())
+        errors = sum(r.errors for r in self.routes.values())
+        print("elapsed %.1fs, players started %d finished %d" % (elapsed, self.players_started, self.players_finished))
+        print("requests %d, throughput %.1f req/s, errors %d (%.2f%%)" % (
+            total, total / elapsed if elapsed else 0.0, errors, 100.0 * errors / total if total else 0.0))
+        print()
+        print("%-11s %8s %9s %9s %9s %9s %7s %12s %12s" % (
+            "route", "count", "req/s", "p50 ms", "p95 ms", "p99 ms", "err %", "cookie B/req", "body B/req"))
+        for label in sorted(self.routes):
+            r = self.routes[label]
+            n = len(r.latencies)
+            lat = sorted(r.latencies)
+            print("%-11s %8d %9.1f %9.2f %9.2f %9.2f %7.2f %12.1f %12.1f" % (
+                label, n, n / elapsed if elapsed else 0.0,
+                _percentile(lat, 50) * 1000, _percentile(lat, 95) * 1000, _percentile(lat, 99) * 1000,
+                100.0 * r.errors / n if n else 0.0,
+                r.set_cookie_bytes / n if n else 0.0,
+                r.bytes_in / n if n else 0.0,
+            ))
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, int(round(pct / 100.0 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[k]
+
+
+# =========================
+# HTTP/1.1 client
+# =========================
+class Connection:
+    def __init__(self, host, port, compressed=False, timeout=30.0):
+        self.host = host
+        self.port = port
+        self.compressed = compressed
+        self.timeout = timeout
+        self.reader = None
+        self.writer = None
+        self.cookies = {}
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except OSError:
+                pass
+        self.reader = self.writer = None
+
+    async def request(self, method, path, body=b"", content_type="application/x-www-form-urlencoded"):
+        for attempt in (0, 1):
+            if self.writer is None:
+                self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+                reused = False
+            else:
+                reused = True
+            try:
+                return await asyncio.wait_for(self._roundtrip(method, path, body, content_type), self.timeout)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                await self.close()
+                # A kept-alive socket may have been closed by the server between requests.
+                if not reused or attempt:
+                    raise
+            except BaseException:
+                await self.close()
+                raise
+
+    async def _roundtrip(self, method, path, body, content_type):
+        lines = ["%s %s HTTP/1.1" % (method, path), "Host: %s:%d" % (self.host, self.port)]
+        if self.compressed:
+            lines.append("Accept-Encoding: gzip")
+        if self.cookies:
+            lines.append("Cookie: " + "; ".join("%s=%s" % kv for kv in self.cookies.items()))
+        if body:
+            lines.append("Content-Type: " + content_type)
+            lines.append("Content-Length: %d" % len(body))
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionResetError("connection closed before response")
+        version, status = status_line.split(None, 2)[:2]
+        headers = []
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers.append((name.strip().lower(), value.strip()))
+        hdr = dict(headers)
+
+        if method == "HEAD" or int(status) in (204, 304):
+            size = 0
+        elif "content-length" in hdr:
+            size = len(await self.reader.readexactly(int(hdr["content-length"])))
+        elif hdr.get("transfer-encoding", "").lower() == "chunked":
+            size = await self._read_chunked()
+        else:
+            size = len(await self.reader.read())
+            await self.close()
+
+        keep_alive = version == b"HTTP/1.1" and hdr.get("connection", "").lower() != "close"
+        if not keep_alive:
+            await self.close()
+
+        set_cookie_bytes = 0
+        for name, value in headers:
+            if name == "set-cookie":
+                set_cookie_bytes += len(value)
+                self._store_cookie(value)
+        return int(status), set_cookie_bytes, size
+
+    async def _read_chunked(self):
+        size = 0
+        while True:
+            line = await self.reader.readline()
+            n = int(line.split(b";", 1)[0].strip() or b"0", 16)
+            if n == 0:
+                # trailers end with an empty line
+                while (await self.reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                return size
+            size += len(await self.reader.readexactly(n))
+            await self.reader.readexactly(2)
+
+    def _store_cookie(self, header):
+        pair, _, attrs = header.partition(";")
+        name, _, value = pair.strip().partition("=")
+        attrs = attrs.lower()
+        if "max-age=0" in attrs or "expires=thu, 01 jan 1970" in attrs or not value:
+            self.cookies.pop(name, None)
+        else:
+            self.cookies[name] = value
+
+
+# =========================
+# Player
+# =========================
+class Player:
+    def __init__(self, args, stats):
+        self.args = args
+        self.stats = stats
+        self.conn = Connection(args.host, args.port, compressed=args.compressed, timeout=args.timeout)
+
+    async def hit(self, label, method, path, body=b"", **kwargs):
+        t0 = time.perf_counter()
+        try:
+            status, cookie_bytes, size = await self.conn.request(method, path, body, **kwargs)
+        except Exception:
+            self.stats.record(label, time.perf_counter() - t0, False)
+            return None
+        self.stats.record(label, time.perf_counter() - t0, status == EXPECTED_STATUS[label], cookie_bytes, size)
+        return status
+
+    async def enter(self):
+        if self.args.first_visit == "inline":
+            # Game on the first response, beacons batched into one POST.
+            await self.hit("home", "GET", "/")
+            await self.hit("beacons", "POST", "/beacons", "\n".join(BEACONS).encode(), content_type="text/plain")
+            return
+        # First visit: loader page, the three beacons, then the game itself.
+        await self.hit("loader", "GET", "/")
+        for path in BEACONS:
+            await self.hit("beacon", "GET", path)
+        await self.hit("home", "GET", "/")
+
+    async def play_round(self):
+        door = random.choice(("life", "death"))
+        if await self.hit("choose", "POST", "/choose", ("door=" + door).encode()) == 302:
+            await self.hit("home", "GET", "/")
+        if random.random() < self.args.reset_prob:
+            if await self.hit("hard-reset", "GET", "/hard-reset") == 302:
+                await self.enter()
+
+    async def think(self):
+        if self.args.think:
+            await asyncio.sleep(random.uniform(0, 2 * self.args.think))
+
+    async def run_until(self, deadline):
+        self.stats.players_started += 1
+        try:
+            await self.enter()
+            while time.perf_counter() < deadline:
+                await self.think()
+                await self.play_round()
+        finally:
+            await self.conn.close()
+            self.stats.players_finished += 1
+
+    async def run_rounds(self, rounds):
+        self.stats.players_started += 1
+        try:
+            await self.enter()
+            for _ in range(rounds):
+                await self.think()
+                await self.play_round()
+        finally:
+            await self.conn.close()
+            self.stats.players_finished += 1
+
+
+# =========================
+# Modes
+# =========================
+async def closed_loop(args, stats):
+    deadline = time.perf_counter() + args.duration
+    tasks = []
+    for i in range(args.players):
+        if args.ramp and i:
+            await asyncio.sleep(args.ramp / args.players)
+        tasks.append(asyncio.create_task(Player(args, stats).run_until(deadline)))
+    await asyncio.gather(*tasks)
+
+
+async def open_loop(args, stats):
+    # Arrivals are scheduled on a fixed clock, so a slow server does not slow
+    # down the offered load (no coordinated omission).
+    start = time.perf_counter()
+    interval = 1.0 / args.rate
+    tasks = set()
+    n = 0
+    while True:
+        at = start + n * interval
+        if at - start >= args.duration:
+            break
+        delay = at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        task = asyncio.create_task(Player(args, stats).run_rounds(args.choices))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        n += 1
+    if tasks:
+        await asyncio.gather(*tasks)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Drive simulated players against a running Life or Death instance.")
+    parser.add_argument("--url", default="http://127.0.0.1:5000", help="base URL of the instance")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds to generate load")
+    parser.add_argument("--players", type=int, default=50, help="closed loop: concurrent players")
+    parser.add_argument("--ramp", type=float, default=0.0, help="closed loop: seconds over which players are started")
+    parser.add_argument("--rate", type=float, default=0.0, help="open loop: new players per second (enables open loop)")
+    parser.add_argument("--choices", type=int, default=20, help="open loop: rounds each player plays")
+    parser.add_argument("--reset-prob", type=float, default=0.02, help="chance of /hard-reset after a round")
+    parser.add_argument("--think", type=float, default=0.0, help="mean think time between rounds, seconds")
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-request timeout, seconds")
+    parser.add_argument("--compressed", action="store_true", help="send Accept-Encoding: gzip")
+    parser.add_argument("--first-visit", choices=("loader", "inline"), default="loader",
+                        help="first-visit flow the server is configured for (FIRST_VISIT_MODE)")
+    parser.add_argument("--seed", type=int, help="seed the players' door picks")
+    args = parser.parse_args(argv)
+
+    url = urlsplit(args.url)
+    if url.scheme != "http":
+        parser.error("only http:// URLs are supported")
+    args.host = url.hostname
+    args.port = url.port or 80
+    return args
+
+
+def run(args):
+    if args.seed is not None:
+        random.seed(args.seed)
+    stats = Stats()
+    asyncio.run(open_loop(args, stats) if args.rate else closed_loop(args, stats))
+    return stats
+
+
+def main(argv=None):
+    run(parse_args(argv)).report()
+
+
+if __name__ == "__main__":
+    main()
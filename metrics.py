@@ -0,0 +1,194 @@
+# metrics.py
+# Request instrumentation with Prometheus text exposition.
+#
+# Recording never takes a lock: every thread writes into its own shard and
+# the shards are only summed when /metrics is scraped. When a thread exits
+# (the dev server uses one thread per request) its shard is folded into a
+# shared "retired" shard, so the number of live shards stays bounded by the
+# number of live threads.
+import threading
+import time
+import weakref
+from bisect import bisect_left
+
+# Seconds; tuned for a page that renders in well under a millisecond.
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+# Bytes
+SIZE_BUCKETS = (64, 256, 512, 1024, 2048, 4096, 8192, 16384, 65536)
+
+
+class _Owner:
+    # Lives in the thread-local; its finalizer runs when the thread goes away.
+    __slots__ = ("data", "__weakref__")
+
+
+class Registry:
+    def __init__(self):
+        self._meta = {}  # name -> (type, help, buckets)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._live = {}  # id(shard) -> shard
+        self._retired = {}
+
+    # ---- declaration ----
+    def counter(self, name, help):
+        self._meta[name] = ("counter", help, None)
+
+    def gauge(self, name, help):
+        self._meta[name] = ("gauge", help, None)
+
+    def histogram(self, name, help, buckets):
+        self._meta[name] = ("histogram", help, tuple(buckets))
+
+    # ---- recording (lock-free) ----
+    def _shard(self):
+        owner = getattr(self._local, "owner", None)
+        if owner is None:
+            owner = self._local.owner = _Owner()
+            owner.data = {}
+            with self._lock:
+                self._live[id(owner.data)] = owner.data
+            weakref.finalize(owner, self._retire, owner.data)
+        return owner.data
+
+    def _retire(self, shard):
+        with self._lock:
+            self._live.pop(id(shard), None)
+            _merge(self._retired, shard)
+
+    def inc(self, name, labels=(), value=1):
+        shard = self._shard()
+        key = (name, labels)
+        shard[key] = shard.get(key, 0) + value
+
+    def observe(self, name, labels, value):
+        shard = self._shard()
+        key = (name, labels)
+        h = shard.get(key)
+        if h is None:
+            # one slot per bucket, one for +Inf, then the sum
+            h = shard[key] = [0] * (len(self._meta[name][2]) + 2)
+        h[bisect_left(self._meta[name][2], value)] += 1
+        h[-1] += value
+
+    # ---- exposition ----
+    def collect(self):
+        with self._lock:
+            shards = [self._retired] + list(self._live.values())
+            totals = {}
+            for shard in shards:
+                _merge(totals, shard)
+        return totals
+
+    def render(self, gauges=None):
+        totals = self.collect()
+        for name, labels, value in gauges or ():
+            totals[(name, labels)] = value
+        by_name = {}
+        for (name, labels), value in totals.items():
+            by_name.setdefault(name, []).append((labels, value))
+
+        out = []
+        for name in sorted(by_name):
+            kind, help, buckets = self._meta[name]
+            out.append("# HELP %s %s" % (name, help))
+            out.append("# TYPE %s %s" % (name, kind))
+            for labels, value in sorted(by_name[name]):
+                if kind != "histogram":
+                    out.append("%s%s %s" % (name, _labels(labels), _num(value)))
+                    continue
+                cumulative = 0
+                for bound, count in zip(buckets + ("+Inf",), value):
+                    cumulative += count
+                    le = bound if bound == "+Inf" else _num(bound)
+                    out.append("%s_bucket%s %d" % (name, _labels(labels + (("le", le),)), cumulative))
+                out.append("%s_sum%s %s" % (name, _labels(labels), _num(value[-1])))
+                out.append("%s_count%s %d" % (name, _labels(labels), cumulative))
+        return "\n".join(out) + "\n"
+
+
+def _merge(into, shard):
+    for key, value in list(shard.items()):
+        if isinstance(value, list):
+            acc = into.get(key)
+            if acc is None:
+                into[key] = list(value)
+            else:
+                for i, v in enumerate(value):
+                    acc[i] += v
+        else:
+            into[key] = into.get(key, 0) + value
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{%s}" % ",".join('%s="%s"' % (k, str(v).replace("\\", "\\\\").replace('"', '\\"')) for k, v in labels)
+
+
+def _num(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# =========================
+# WSGI middleware
+# =========================
+# Wraps the whole app so the timing includes session save and body iteration
+# and the Set-Cookie header is visible. The Flask app stores the matched
+# endpoint in environ["lod.endpoint"].
+class MetricsMiddleware:
+    def __init__(self, wsgi_app, registry, cookie_name="session"):
+        self.wsgi_app = wsgi_app
+        self.registry = registry
+        self.cookie_prefix = cookie_name + "="
+        registry.counter("lod_http_requests_total", "HTTP requests by endpoint, method and status.")
+        registry.histogram("lod_http_request_duration_seconds", "Time to produce the full response.", LATENCY_BUCKETS)
+        registry.histogram("lod_http_response_bytes", "Response body bytes as sent.", SIZE_BUCKETS)
+        registry.histogram("lod_session_cookie_bytes", "Size of the Set-Cookie header for the session cookie.", SIZE_BUCKETS)
+
+    def __call__(self, environ, start_response):
+        started = time.perf_counter()
+        seen = []
+
+        def _start_response(status, headers, exc_info=None):
+            seen[:] = [status, headers]
+            return start_response(status, headers, exc_info)
+
+        body = self.wsgi_app(environ, _start_response)
+        return _CountingBody(body, self, environ, started, seen)
+
+    def record(self, environ, started, seen, size):
+        elapsed = time.perf_counter() - started
+        endpoint = environ.get("lod.endpoint") or "<unmatched>"
+        status = seen[0].split(None, 1)[0] if seen else "500"
+        reg = self.registry
+        reg.inc("lod_http_requests_total", (("endpoint", endpoint), ("method", environ.get("REQUEST_METHOD", "")), ("status", status)))
+        ep = (("endpoint", endpoint),)
+        reg.observe("lod_http_request_duration_seconds", ep, elapsed)
+        reg.observe("lod_http_response_bytes", ep, size)
+        for name, value in seen[1] if seen else ():
+            if name.lower() == "set-cookie" and value.startswith(self.cookie_prefix):
+                reg.observe("lod_session_cookie_bytes", ep, len(value))
+
+
+class _CountingBody:
+    def __init__(self, body, middleware, environ, started, seen):
+        self.body = body
+        self.middleware = middleware
+        self.environ = environ
+        self.started = started
+        self.seen = seen
+        self.size = 0
+
+    def __iter__(self):
+        for chunk in self.body:
+            self.size += len(chunk)
+            yield chunk
+
+    def close(self):
+        try:
+            close = getattr(self.body, "close", None)
+            if close is not None:
+                close()
+        finally:
+            self.middleware.record(self.environ, self.started, self.seen, self.size)
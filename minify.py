@@ -0,0 +1,48 @@
+# minify.py
+# Startup-time minifiers for the page templates and static assets. They only
+# drop what the browser ignores anyway: comments, indentation and blank lines.
+# They are not general-purpose minifiers, just enough for what this app ships
+# (no <pre>/<textarea>, no multi-line JS strings).
+import re
+
+_HTML_COMMENT = re.compile(r"<!--(?!\[).*?-->", re.S)
+_NEWLINE_RUN = re.compile(r"[ \t]*\n\s*")
+
+_CSS_STRING = re.compile(r"""("(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')""")
+_CSS_COMMENT = re.compile(r"/\*.*?\*/", re.S)
+_CSS_SPACE = re.compile(r"\s+")
+_CSS_PUNCT = re.compile(r" ?([{};,>]) ?")
+_CSS_COLON = re.compile(r": ")
+
+
+def minify_html(source):
+    # Comments go, and any whitespace run with a line break in it becomes a
+    # single line break, which renders exactly like the run it replaces.
+    # Also used for SVG and for Jinja template sources.
+    return _NEWLINE_RUN.sub("\n", _HTML_COMMENT.sub("", source)).strip() + "\n"
+
+
+def minify_css(source):
+    # Comments, whitespace around punctuation and the last ';' of each block;
+    # quoted strings are left untouched.
+    parts = _CSS_STRING.split(_CSS_COMMENT.sub("", source))
+    for i in range(0, len(parts), 2):
+        css = _CSS_SPACE.sub(" ", parts[i])
+        css = _CSS_PUNCT.sub(r"\1", css)
+        parts[i] = _CSS_COLON.sub(":", css).replace(";}", "}")
+    return "".join(parts).strip() + "\n"
+
+
+def minify_js(source):
+    # Indentation, blank lines and whole-line // comments. Every remaining
+    # line break stays, so automatic semicolon insertion sees the same program.
+    lines = (line.strip() for line in source.splitlines())
+    return "\n".join(line for line in lines if line and not line.startswith("//")) + "\n"
+
+
+# Static asset extension -> minifier
+MINIFIERS = {
+    ".css": minify_css,
+    ".js": minify_js,
+    ".svg": minify_html,
+}
@@ -0,0 +1,135 @@
+# ratelimit.py
+# Per-client token buckets for the routes bots like to hammer.
+#
+# Buckets live in a fixed-size table of three flat arrays (key fingerprint,
+# tokens, last update), so memory is bounded no matter how many clients show
+# up. The table is 2-way set-associative: a key hashes to a pair of slots and,
+# when both hold other keys, the one touched longest ago is evicted. An evicted
+# client just starts again with a full bucket, so eviction errs on the side of
+# letting traffic through.
+#
+# The check runs as WSGI middleware in front of Flask, so a rejected request
+# costs a dict lookup, a hash and a few array reads: no session decode, no
+# routing, no rendering.
+import math
+import threading
+import time
+from array import array
+
+_LOCK_STRIPES = 64
+_MASK64 = (1 << 64) - 1
+
+
+class BucketTable:
+    def __init__(self, size=65536):
+        size = 1 << max(1, (size - 1).bit_length())  # power of two, at least 2
+        self.size = size
+        self._set_mask = size // 2 - 1
+        self._keys = array("Q", bytes(8 * size))  # 0 = empty slot
+        self._tokens = array("d", bytes(8 * size))
+        self._stamps = array("d", bytes(8 * size))
+        self._locks = [threading.Lock() for _ in range(_LOCK_STRIPES)]
+        self.evictions = 0  # approximate: counted under per-stripe locks
+
+    def take(self, key, rate, burst, now=None):
+        # Takes one token for key. Returns 0.0 if allowed, otherwise the
+        # seconds until a token will be available.
+        if now is None:
+            now = time.monotonic()
+        h = hash(key) & _MASK64 or 1
+        pair = h & self._set_mask
+        a, b = 2 * pair, 2 * pair + 1
+        keys, tokens, stamps = self._keys, self._tokens, self._stamps
+        with self._locks[pair % _LOCK_STRIPES]:
+            if keys[a] == h:
+                slot = a
+            elif keys[b] == h:
+                slot = b
+            else:
+                slot = a if stamps[a] <= stamps[b] else b
+                if keys[slot]:
+                    self.evictions += 1
+                keys[slot] = h
+                tokens[slot] = burst
+                stamps[slot] = now
+            level = min(burst, tokens[slot] + (now - stamps[slot]) * rate)
+            stamps[slot] = now
+            if level >= 1.0:
+                tokens[slot] = level - 1.0
+                return 0.0
+            tokens[slot] = level
+        return (1.0 - level) / rate
+
+    def __len__(self):
+        return sum(1 for k in self._keys if k)
+
+
+class RateLimitMiddleware:
+    # limits: group -> (tokens per second, burst)
+    # endpoints: Flask endpoint -> group
+    def __init__(self, wsgi_app, flask_app, limits, endpoints, table, registry=None,
+                 key="ip", cookie_name="session", store=None):
+        self.wsgi_app = wsgi_app
+        self.flask_app = flask_app
+        self.limits = {group: (float(rate), float(burst)) for group, (rate, burst) in limits.items()}
+        self.endpoints = endpoints
+        self.table = table
+        self.registry = registry
+        self.key = key
+        self.cookie_name = cookie_name
+        self.store = store  # the session store, for key="session"
+        self._routes = None
+        if registry is not None:
+            registry.counter("lod_ratelimit_allowed_total", "Requests to rate-limited routes that were let through.")
+            registry.counter("lod_ratelimit_rejected_total", "Requests rejected with 429 by the rate limiter.")
+
+    def route_table(self):
+        # (method, path) -> (group, endpoint), built from the URL map on first
+        # use (routes are registered after the middleware is installed).
+        routes = {}
+        for rule in self.flask_app.url_map.iter_rules():
+            group = self.endpoints.get(rule.endpoint)
+            if group in self.limits and not rule.arguments:
+                for method in rule.methods:
+                    routes[(method, rule.rule)] = (group, rule.endpoint)
+        self._routes = routes
+        return routes
+
+    def client_key(self, environ):
+        if self.key == "session":
+            # Only meaningful for server-side sessions, whose cookie is a stable
+            # opaque ID. The ID only counts if the store knows it: otherwise a
+            # client could send a made-up ID per request and get a fresh bucket
+            # each time. New players are keyed by address until they have one.
+            for part in environ.get("HTTP_COOKIE", "").split(";"):
+                name, _, value = part.strip().partition("=")
+                if name == self.cookie_name and value:
+                    if self.store.get(value) is not None:
+                        return "s:" + value
+                    break
+        return environ.get("REMOTE_ADDR", "")
+
+    def __call__(self, environ, start_response):
+        routes = self._routes if self._routes is not None else self.route_table()
+        match = routes.get((environ.get("REQUEST_METHOD"), environ.get("PATH_INFO")))
+        if match is None:
+            return self.wsgi_app(environ, start_response)
+
+        group, endpoint = match
+        rate, burst = self.limits[group]
+        wait = self.table.take((group, self.client_key(environ)), rate, burst)
+        if self.registry is not None:
+            self.registry.inc("lod_ratelimit_rejected_total" if wait else "lod_ratelimit_allowed_total",
+                              (("route", group),))
+        if not wait:
+            return self.wsgi_app(environ, start_response)
+
+        environ["lod.endpoint"] = endpoint
+        body = b"Too many requests, slow down.\n"
+        start_response("429 Too Many Requests", [
+            ("Content-Type", "text/plain; charset=utf-8"),
+            ("Content-Length", str(len(body))),
+            ("Retry-After", str(max(1, math.ceil(wait)))),
+            ("Cache-Control", "no-store"),
+        ])
+        return [body]
@@ -0,0 +1,292 @@
+# serve.py
+# Production launcher. The master process imports the app (templates, assets
+# and the bytecode cache are loaded once), binds the listening socket and
+# pre-forks worker processes that all accept() on that one socket. Each worker
+# runs werkzeug's threaded server with HTTP/1.1 keep-alive around the app.
+#
+#   python serve.py --workers 4 --port 5000
+#   LOD_SERVE_WORKERS=4 LOD_SESSION_BACKEND=sqlite python serve.py
+#
+# Signals to the master:
+#   SIGTERM, SIGINT  stop; workers finish their in-flight requests first
+#   SIGHUP           graceful restart: start a new set of workers, then drain the old ones
+# A worker that has served --max-requests requests drains and exits, and the
+# master starts a replacement. The app warms up at import, before the fork,
+# so workers start warm; a draining worker answers /readyz with 503.
+#
+# Everything the app keeps in memory is per worker: the fragment cache,
+# /metrics, the /spectate feed and the "memory" session backend. Use the cookie or sqlite session
+# backend with more than one worker.
+import argparse
+import os
+import random
+import signal
+import socket
+import sys
+import threading
+import time
+
+from werkzeug.serving import ThreadedWSGIServer, WSGIRequestHandler, select_address_family, get_sockaddr
+
+from app import app, app_ready, event_log, leaderboard, spectators, startup_timings
+from leaderboard import start_snapshotter
+from sessions import start_sweeper
+
+
+def log(message, *args):
+    print("[%d] %s" % (os.getpid(), message % args), file=sys.stderr, flush=True)
+
+
+# =========================
+# Worker
+# =========================
+class RequestHandler(WSGIRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive and chunked responses
+    timeout = 5  # idle keep-alive / slow client timeout, set from the config
+
+    def run_wsgi(self):
+        self.server.request_started()
+        try:
+            super().run_wsgi()
+        finally:
+            self.server.request_finished()
+            # Tell keep-alive clients to go elsewhere once this worker is draining.
+            if self.server.draining.is_set():
+                self.close_connection = True
+
+    def log_request(self, code="-", size="-"):
+        if self.server.access_log:
+            super().log_request(code, size)
+
+    def log_error(self, format, *args):
+        # Idle keep-alive connections timing out are routine.
+        if not format.startswith("Request timed out"):
+            super().log_error(format, *args)
+
+
+class WorkerServer(ThreadedWSGIServer):
+    def __init__(self, sock, wsgi_app, max_requests=0, access_log=False, ready=None):
+        host, port = sock.getsockname()[:2]
+        super().__init__(host, port, wsgi_app, RequestHandler, fd=sock.fileno())
+        self.max_requests = max_requests
+        self.access_log = access_log
+        self.ready = ready  # cleared on drain, so /readyz turns 503
+        self.draining = threading.Event()
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self.active = 0
+        self.served = 0
+
+    def request_started(self):
+        with self._lock:
+            self.active += 1
+            self.served += 1
+            recycle = self.max_requests and self.served >= self.max_requests
+        if recycle:
+            self.drain()
+
+    def request_finished(self):
+        with self._lock:
+            self.active -= 1
+            if not self.active:
+                self._idle.notify_all()
+
+    def drain(self):
+        if self.draining.is_set():
+            return
+        self.draining.set()
+        if self.ready is not None:
+            self.ready.clear()
+        # shutdown() waits for serve_forever() to return, so not from its own thread.
+        threading.Thread(target=self.shutdown, daemon=True).start()
+
+    def wait_idle(self, timeout):
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            while self.active:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._idle.wait(remaining)
+        return True
+
+
+def run_worker(sock, config):
+    # Only the master reacts to Ctrl-C and SIGHUP; it turns them into SIGTERM.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+
+    max_requests = config["max_requests"]
+    if max_requests and config["max_requests_jitter"]:
+        # Spread recycling so workers started together don't all restart together.
+        max_requests += random.randint(0, config["max_requests_jitter"])
+    RequestHandler.timeout = config["keepalive_timeout"] or None
+    # Background threads run in the workers: the ones started at import stayed
+    # behind in the master, and the snapshotter is never started there.
+    if app.config["SESSION_BACKEND"] == "memory":
+        start_sweeper(app.session_interface.store, app.config["SESSION_SWEEP_INTERVAL"])
+    if app.config["LEADERBOARD_PATH"]:
+        start_snapshotter(leaderboard, app.config["LEADERBOARD_PATH"], app.config["LEADERBOARD_SNAPSHOT_INTERVAL"])
+    server = WorkerServer(sock, app, max_requests, config["access_log"], ready=app_ready)
+    signal.signal(signal.SIGTERM, lambda signum, frame: server.drain())
+
+    server.serve_forever()  # returns once draining; closes this worker's copy of the socket
+    spectators.close()  # end the open /spectate/stream responses so they don't hold up the drain
+    if not server.wait_idle(config["graceful_timeout"]):
+        log("worker gave up on %d in-flight requests", server.active)
+    # os._exit() skips atexit
+    if event_log is not None:
+        event_log.close()
+    if app.config["LEADERBOARD_PATH"]:
+        leaderboard.snapshot(app.config["LEADERBOARD_PATH"])
+    log("worker exiting after %d requests", server.served)
+
+
+# =========================
+# Master
+# =========================
+class Master:
+    def __init__(self, sock, config):
+        self.sock = sock
+        self.config = config
+        self.workers = {}  # pid -> generation
+        self.generation = 0
+        self.signals = []
+        self.stopping = False
+
+    def spawn(self):
+        pid = os.fork()
+        if pid:
+            self.workers[pid] = self.generation
+            return
+        status = 0
+        try:
+            run_worker(self.sock, self.config)
+        except BaseException:
+            import traceback
+            traceback.print_exc()
+            status = 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(status)
+
+    def stop_workers(self, pids, sig=signal.SIGTERM):
+        for pid in pids:
+            try:
+                os.kill(pid, sig)
+            except ProcessLookupError:
+                pass
+
+    def reap(self):
+        while self.workers:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if not pid:
+                return
+            generation = self.workers.pop(pid, None)
+            if status:
+                log("worker %d exited with status %d", pid, os.waitstatus_to_exitcode(status))
+            # Workers recycled after max-requests (or crashed) are replaced; the
+            # old generation after a SIGHUP is not.
+            if generation == self.generation and not self.stopping:
+                self.spawn()
+
+    def run(self):
+        for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+            signal.signal(sig, lambda signum, frame: self.signals.append(signum))
+
+        for _ in range(self.config["workers"]):
+            self.spawn()
+        log("listening on http://%s:%d with %d workers", *self.sock.getsockname()[:2], self.config["workers"])
+
+        while True:
+            while self.signals:
+                sig = self.signals.pop(0)
+                if sig == signal.SIGHUP:
+                    log("restarting workers")
+                    old = list(self.workers)
+                    self.generation += 1
+                    for _ in range(self.config["workers"]):
+                        self.spawn()
+                    self.stop_workers(old)
+                else:
+                    return self.shutdown()
+            self.reap()
+            time.sleep(0.1)
+
+    def shutdown(self):
+        self.stopping = True
+        log("shutting down %d workers", len(self.workers))
+        self.stop_workers(list(self.workers))
+        deadline = time.monotonic() + self.config["graceful_timeout"] + 1
+        while self.workers and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(0.05)
+        if self.workers:
+            log("killing %d workers", len(self.workers))
+            self.stop_workers(list(self.workers), signal.SIGKILL)
+            while self.workers:
+                pid, _ = os.waitpid(-1, 0)
+                self.workers.pop(pid, None)
+        self.sock.close()
+
+
+def bind(host, port, backlog):
+    family = select_address_family(host, port)
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(get_sockaddr(host, port, family))
+    sock.listen(backlog)
+    # Every worker is woken for a new connection and only one accept() wins;
+    # the others must not block in accept().
+    sock.setblocking(False)
+    return sock
+
+
+def cpu_count():
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def main(argv=None):
+    cfg = app.config
+    parser = argparse.ArgumentParser(description="Serve Life or Death with pre-forked worker processes.")
+    parser.add_argument("--host", default=cfg["SERVE_HOST"])
+    parser.add_argument("--port", type=int, default=cfg["SERVE_PORT"])
+    parser.add_argument("--workers", type=int, default=cfg["SERVE_WORKERS"],
+                        help="worker processes, 0 = one per CPU (default %(default)s)")
+    parser.add_argument("--backlog", type=int, default=cfg["SERVE_BACKLOG"], help="listen() backlog")
+    parser.add_argument("--keepalive-timeout", type=float, default=cfg["SERVE_KEEPALIVE_TIMEOUT"],
+                        help="seconds an idle or slow connection is kept, 0 = no limit")
+    parser.add_argument("--graceful-timeout", type=float, default=cfg["SERVE_GRACEFUL_TIMEOUT"],
+                        help="seconds a stopping worker gets to finish in-flight requests")
+    parser.add_argument("--max-requests", type=int, default=cfg["SERVE_MAX_REQUESTS"],
+                        help="recycle a worker after this many requests, 0 = never")
+    parser.add_argument("--max-requests-jitter", type=int, default=cfg["SERVE_MAX_REQUESTS_JITTER"],
+                        help="random extra requests added to --max-requests per worker")
+    parser.add_argument("--access-log", action="store_true", help="log every request")
+    args = parser.parse_args(argv)
+
+    workers = args.workers or cpu_count()
+    if cfg["SESSION_BACKEND"] == "memory" and workers > 1:
+        parser.error("the memory session backend is per process; use LOD_SESSION_BACKEND=sqlite or cookie with more than one worker")
+
+    config = {
+        "workers": workers,
+        "keepalive_timeout": args.keepalive_timeout,
+        "graceful_timeout": args.graceful_timeout,
+        "max_requests": args.max_requests,
+        "max_requests_jitter": args.max_requests_jitter,
+        "access_log": args.access_log,
+    }
+    log("app loaded in %.1f ms: %s", sum(t for _, t in startup_timings) * 1000,
+        ", ".join("%s %.1f" % (phase, t * 1000) for phase, t in startup_timings))
+    Master(bind(args.host, args.port, args.backlog), config).run()
+
+
+if __name__ == "__main__":
+    main()
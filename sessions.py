@@ -0,0 +1,252 @@
+# sessions.py
+# Server-side sessions: the cookie carries only an opaque random ID and the
+# session data lives in a store (in-process LRU or SQLite). Selected with the
+# SESSION_BACKEND config key; "cookie" keeps Flask's signed-cookie sessions.
+import os
+import queue
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from flask.sessions import SessionInterface, SessionMixin, session_json_serializer
+from werkzeug.datastructures import CallbackDict
+
+
+class ServerSideSession(CallbackDict, SessionMixin):
+    def __init__(self, initial=None, sid=None, new=False):
+        def on_update(self):
+            self.modified = True
+            self.accessed = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.modified = False
+        self.accessed = False
+
+    # Same access tracking as Flask's SecureCookieSession, so Vary: Cookie is right.
+    def __getitem__(self, key):
+        self.accessed = True
+        return super().__getitem__(key)
+
+    def get(self, key, default=None):
+        self.accessed = True
+        return super().get(key, default)
+
+    def setdefault(self, key, default=None):
+        self.accessed = True
+        return super().setdefault(key, default)
+
+
+# =========================
+# Stores
+# =========================
+# Both stores keep the serialized session string, so a request never shares
+# mutable objects with another request and both backends behave the same.
+class MemoryStore:
+    def __init__(self, ttl, max_entries=100_000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._data = OrderedDict()  # sid -> (expires_at, payload), least recently used first
+
+    def get(self, sid):
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(sid)
+            if item is None:
+                return None
+            if item[0] <= now:
+                del self._data[sid]
+                return None
+            self._data[sid] = (now + self.ttl, item[1])
+            self._data.move_to_end(sid)
+            return item[1]
+
+    def set(self, sid, payload):
+        with self._lock:
+            self._data[sid] = (time.monotonic() + self.ttl, payload)
+            self._data.move_to_end(sid)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def touch(self, sid):
+        # get() already refreshed the expiry
+        pass
+
+    def delete(self, sid):
+        with self._lock:
+            self._data.pop(sid, None)
+
+    def purge_expired(self):
+        # Every access pushes the expiry out by the same TTL, so LRU order is
+        # also expiry order and expired entries are all at the front.
+        now = time.monotonic()
+        removed = 0
+        with self._lock:
+            while self._data:
+                sid, (expires_at, _) = next(iter(self._data.items()))
+                if expires_at > now:
+                    break
+                del self._data[sid]
+                removed += 1
+        return removed
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteStore:
+    def __init__(self, path, ttl):
+        self.path = path
+        self.ttl = ttl
+        self._pool = queue.LifoQueue()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            " sid TEXT PRIMARY KEY,"
+            " expires_at REAL NOT NULL,"
+            " data TEXT NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS sessions_expires_at ON sessions (expires_at)")
+        conn.close()
+        # SQLite connections must not cross a fork, and serve.py forks workers
+        # after the master's sweeper has pooled some: a child starts with an
+        # empty pool. The inherited connections are kept referenced, never
+        # used or closed, so the child doesn't touch the parent's handles.
+        self._inherited = []
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        self._inherited.append(self._pool)
+        self._pool = queue.LifoQueue()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def _conn(self):
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def get(self, sid):
+        with self._conn() as conn:
+            row = conn.execute(
+                "SELECT data FROM sessions WHERE sid = ? AND expires_at > ?", (sid, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, sid, payload):
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT INTO sessions (sid, expires_at, data) VALUES (?, ?, ?)"
+                " ON CONFLICT (sid) DO UPDATE SET expires_at = excluded.expires_at, data = excluded.data",
+                (sid, time.time() + self.ttl, payload),
+            )
+
+    def touch(self, sid):
+        with self._conn() as conn:
+            conn.execute("UPDATE sessions SET expires_at = ? WHERE sid = ?", (time.time() + self.ttl, sid))
+
+    def delete(self, sid):
+        with self._conn() as conn:
+            conn.execute("DELETE FROM sessions WHERE sid = ?", (sid,))
+
+    def purge_expired(self):
+        with self._conn() as conn:
+            return conn.execute("DELETE FROM sessions WHERE expires_at <= ?", (time.time(),)).rowcount
+
+    def __len__(self):
+        with self._conn() as conn:
+            return conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+
+def create_store(app):
+    backend = app.config["SESSION_BACKEND"]
+    ttl = app.permanent_session_lifetime.total_seconds()
+    if backend == "memory":
+        return MemoryStore(ttl, app.config["SESSION_MAX_ENTRIES"])
+    if backend == "sqlite":
+        return SQLiteStore(app.config["SESSION_DB_PATH"], ttl)
+    raise ValueError("unknown SESSION_BACKEND %r" % backend)
+
+
+def start_sweeper(store, interval):
+    def sweep():
+        while True:
+            time.sleep(interval)
+            store.purge_expired()
+
+    thread = threading.Thread(target=sweep, name="session-sweeper", daemon=True)
+    thread.start()
+    return thread
+
+
+# =========================
+# Flask integration
+# =========================
+class ServerSideSessionInterface(SessionInterface):
+    serializer = session_json_serializer
+    session_class = ServerSideSession
+
+    def __init__(self, store):
+        self.store = store
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            payload = self.store.get(sid)
+            if payload is not None:
+                return self.session_class(self.serializer.loads(payload), sid=sid)
+        # Unknown or expired IDs are never reused, so clients can't pick their own.
+        return self.session_class(sid=secrets.token_urlsafe(32), new=True)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        secure = self.get_cookie_secure(app)
+        samesite = self.get_cookie_samesite(app)
+        httponly = self.get_cookie_httponly(app)
+
+        if session.accessed:
+            response.vary.add("Cookie")
+
+        if not session:
+            if session.modified:
+                self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path, secure=secure,
+                                       samesite=samesite, httponly=httponly)
+            return
+
+        if not self.should_set_cookie(app, session):
+            return
+
+        if session.modified or session.new:
+            self.store.set(session.sid, self.serializer.dumps(dict(session)))
+        else:
+            self.store.touch(session.sid)
+
+        response.set_cookie(
+            name,
+            session.sid,
+            expires=self.get_expiration_time(app, session),
+            httponly=httponly,
+            domain=domain,
+            path=path,
+            secure=secure,
+            samesite=samesite,
+        )
@@ -0,0 +1,151 @@
+# spectate.py
+# Live feed of every evaluated pick, for the spectator wall (GET /spectate)
+# through Server-Sent Events (GET /spectate/stream).
+#
+# The request path only appends the pick to a bounded deque (no lock, no
+# formatting, nothing at all when nobody is watching). One broadcaster thread
+# drains it every `interval`, formats the batch as SSE frames once, appends
+# the frames to each subscriber's own bounded deque and sets its event (one
+# event per subscriber, so waking thousands of them doesn't serialize on a
+# shared lock).
+# Both deques drop their oldest entries when full, so neither a burst of
+# picks nor a viewer on a slow connection can hold up the game; a subscriber
+# that lost frames gets a "gap" event with the number of picks it missed.
+#
+# Everything is per process: with serve.py --workers N, each worker's feed
+# carries the picks that worker evaluated.
+import json
+import os
+import threading
+import time
+from collections import deque
+
+
+class Subscription:
+    __slots__ = ("frames", "dropped", "ready")
+
+    def __init__(self, size):
+        self.frames = deque(maxlen=size)  # (picks in the frame, SSE bytes)
+        self.dropped = 0  # picks lost to a full buffer
+        self.ready = threading.Event()  # set when frames arrive
+
+
+class Broadcaster:
+    def __init__(self, inbox_size=4096, buffer_size=256, interval=0.05, keepalive=15.0, label=str):
+        self.buffer_size = buffer_size
+        self.interval = interval
+        self.keepalive = keepalive
+        self.label = label  # player ID -> public name
+        self.dropped = 0  # picks dropped across all subscribers (approximate)
+        self.delivered = 0  # picks handed to subscribers
+        self._inbox = deque(maxlen=inbox_size)
+        self._subscribers = {}  # id(subscription) -> subscription
+        self._lock = threading.Lock()  # guards _subscribers
+        self._closed = False
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        # Like the event log: a forked worker starts its own thread on first use.
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        self._inbox.clear()
+        self._subscribers = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._subscribers)
+
+    # ---- request path ----
+    def publish(self, player, attempt, round, pick, correct, won, wins):
+        if self._subscribers:
+            self._inbox.append((time.time(), player, attempt, round, pick, correct, won, wins))
+
+    # ---- subscribers ----
+    def subscribe(self):
+        if self._thread is None:
+            self._start()
+        sub = Subscription(self.buffer_size)
+        with self._lock:
+            self._subscribers[id(sub)] = sub
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            self._subscribers.pop(id(sub), None)
+
+    def stream(self):
+        # The SSE response body: a retry hint, then frames as they arrive and
+        # a comment line every `keepalive` seconds so proxies keep the
+        # connection open and a gone client is noticed.
+        sub = self.subscribe()
+        reported = 0
+        try:
+            yield b"retry: 2000\n\n"
+            while not self._closed:
+                woken = sub.ready.wait(self.keepalive)
+                sub.ready.clear()
+                frames = []
+                while True:
+                    try:
+                        frames.append(sub.frames.popleft()[1])
+                    except IndexError:
+                        break
+                if sub.dropped != reported:
+                    frames.insert(0, b'event: gap\ndata: {"missed": %d}\n\n' % (sub.dropped - reported))
+                    reported = sub.dropped
+                if frames:
+                    yield b"".join(frames)
+                elif not woken:
+                    yield b": keepalive\n\n"
+        finally:
+            self.unsubscribe(sub)
+
+    # ---- broadcaster ----
+    def _start(self):
+        with self._thread_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="spectate-broadcast", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while not self._closed:
+            time.sleep(self.interval)
+            self.broadcast()
+
+    def broadcast(self):
+        inbox = self._inbox
+        frames = []
+        while True:
+            try:
+                ts, player, attempt, round, pick, correct, won, wins = inbox.popleft()
+            except IndexError:
+                break
+            frames.append(b"data: %s\n\n" % json.dumps({
+                "ts": int(ts * 1000), "player": self.label(player), "attempt": attempt + 1, "round": round,
+                "pick": pick, "correct": correct, "outcome": "WIN" if won else "LOSS", "streak": wins,
+            }, separators=(",", ":")).encode("utf-8"))
+        if not frames:
+            return 0
+        frame = (len(frames), b"".join(frames))
+        subscribers = list(self._subscribers.values())
+        for sub in subscribers:
+            if len(sub.frames) == self.buffer_size:
+                try:
+                    lost = sub.frames[0][0]
+                except IndexError:  # the subscriber just drained it
+                    lost = 0
+                sub.dropped += lost
+                self.dropped += lost
+            sub.frames.append(frame)
+            sub.ready.set()
+        self.delivered += len(frames) * len(subscribers)
+        return len(frames)
+
+    def close(self):
+        # Ends every open stream (serve.py calls this when a worker drains).
+        self._closed = True
+        for sub in list(self._subscribers.values()):
+            sub.ready.set()
+
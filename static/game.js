@@ -0,0 +1,475 @@
+(function(){
+  "use strict";
+
+  // Per-render state handed over by the page
+  const data = JSON.parse(document.getElementById('game-data').textContent);
+
+  // Low-power mode (server-chosen, or the browser asks for reduced motion):
+  // no falling stars and no parallax, so nothing animates while idle.
+  const lowPower = data.low_power ||
+    (window.matchMedia && window.matchMedia('(prefers-reduced-motion: reduce)').matches);
+
+  // First visit without the loader page: report the beacons in one
+  // non-blocking request instead of three fetches and a reload.
+  if (data.beacons) {
+    const body = data.beacons.join('\n');
+    if (!(navigator.sendBeacon && navigator.sendBeacon('/beacons', body))) {
+      fetch('/beacons', {method: 'POST', body: body, keepalive: true, cache: 'no-store'}).catch(() => {});
+    }
+  }
+
+  // Particle engine: falling stars, confetti and result bursts, drawn on two
+  // canvases (the background and an effects layer above the card) from a
+  // single requestAnimationFrame loop. Particles come from a pool allocated
+  // up front; live ones sit at the front of the array, so spawning and
+  // expiring never allocate or touch the DOM.
+  const fx = (function(){
+    const POOL_SIZE = 512;
+    const STAR = 0, CONFETTI = 1, BURST = 2;
+    const layers = ['bg-animation', 'fx-layer'].map(id => {
+      const canvas = document.getElementById(id);
+      const ctx = canvas && canvas.getContext && canvas.getContext('2d');
+      return ctx ? {canvas: canvas, ctx: ctx, drawn: false} : null;
+    });
+    const pool = [];
+    for (let i = 0; i < POOL_SIZE; i++) {
+      pool.push({kind: STAR, x: 0, y: 0, dx: 0, dy: 0, size: 0, color: '', start: 0, end: 0, duration: 0});
+    }
+    let live = 0;
+    let frame = null;
+    let dpr = 1, width = 0, height = 0;
+    let drawMs = 0;
+
+    // CSS timing functions, sampled once into lookup tables.
+    function timing(x1, y1, x2, y2) {
+      const bezier = (t, a, b) => 3 * a * t * (1 - t) * (1 - t) + 3 * b * t * t * (1 - t) + t * t * t;
+      const table = new Float32Array(65);
+      for (let i = 0; i <= 64; i++) {
+        let lo = 0, hi = 1;
+        for (let k = 0; k < 20; k++) {
+          const mid = (lo + hi) / 2;
+          if (bezier(mid, x1, x2) < i / 64) lo = mid; else hi = mid;
+        }
+        table[i] = bezier((lo + hi) / 2, y1, y2);
+      }
+      return p => {
+        const f = p * 64, i = f | 0;
+        return i >= 64 ? 1 : table[i] + (table[i + 1] - table[i]) * (f - i);
+      };
+    }
+    const easeIn = timing(0.42, 0, 1, 1);
+    const easeOut = timing(0, 0, 0.58, 1);
+
+    function resize() {
+      dpr = window.devicePixelRatio || 1;
+      width = window.innerWidth;
+      height = window.innerHeight;
+      layers.forEach(layer => {
+        if (!layer) return;
+        layer.canvas.width = Math.round(width * dpr);
+        layer.canvas.height = Math.round(height * dpr);
+        layer.drawn = false;  // resizing cleared it
+      });
+      schedule();
+    }
+
+    function schedule() {
+      if (!frame && live) frame = requestAnimationFrame(tick);
+    }
+
+    // x is a fraction of the viewport width for stars and confetti, and an
+    // offset from the centre for bursts; times are in milliseconds.
+    function spawn(kind, color, x, dx, dy, size, delay, duration) {
+      if (live === POOL_SIZE || !layers[kind === STAR ? 0 : 1]) return null;
+      const p = pool[live++];
+      p.kind = kind;
+      p.color = color;
+      p.x = x;
+      p.dx = dx;
+      p.dy = dy;
+      p.size = size;
+      p.start = performance.now() + delay;
+      p.duration = duration;
+      p.end = p.start + duration;
+      schedule();
+      return p;
+    }
+
+    // Same paths as the CSS animations they replace: rotation is about the
+    // element's centre, opacity goes from 1 to 0 over the animation.
+    function draw(ctx, p, progress) {
+      let cx, cy, w, h, turn;
+      if (p.kind === STAR) {
+        // star-fall: 4px streak growing to 100px, -100px to 100vh, two turns, linear
+        w = 4;
+        h = progress * 100;
+        cx = p.x * width + 2;
+        cy = -100 + progress * (height + 100) + h / 2;
+        turn = progress;
+      } else if (p.kind === CONFETTI) {
+        // drop: 12px square, -40vh to 110vh, two turns, ease-in
+        progress = easeIn(progress);
+        w = h = 12;
+        cx = p.x * width + 6;
+        cy = (-0.4 + progress * 1.5) * height + 6;
+        turn = progress;
+      } else {
+        // particleFloat: dot from the centre to (dx, dy), scale 0 to 1, ease-out
+        progress = easeOut(progress);
+        ctx.globalAlpha = 1 - progress;
+        ctx.fillStyle = p.color;
+        ctx.setTransform(dpr, 0, 0, dpr, 0, 0);
+        ctx.beginPath();
+        ctx.arc(width / 2 + p.size / 2 + p.dx * progress, height / 2 + p.size / 2 + p.dy * progress,
+                p.size / 2 * progress, 0, 2 * Math.PI);
+        ctx.fill();
+        return;
+      }
+      const angle = turn * 4 * Math.PI, c = Math.cos(angle) * dpr, s = Math.sin(angle) * dpr;
+      ctx.globalAlpha = 1 - progress;
+      ctx.fillStyle = p.color;
+      ctx.setTransform(c, s, -s, c, cx * dpr, cy * dpr);
+      if (p.kind === STAR) {
+        ctx.beginPath();
+        ctx.ellipse(0, 0, w / 2, h / 2 || 0.01, 0, 0, 2 * Math.PI);
+        ctx.fill();
+      } else {
+        ctx.fillRect(-w / 2, -h / 2, w, h);
+      }
+    }
+
+    function tick(now) {
+      frame = null;
+      const started = performance.now();
+      layers.forEach(layer => {
+        if (layer && layer.drawn) {
+          layer.ctx.setTransform(1, 0, 0, 1, 0, 0);
+          layer.ctx.clearRect(0, 0, layer.canvas.width, layer.canvas.height);
+          layer.drawn = false;
+        }
+      });
+      for (let i = 0; i < live;) {
+        const p = pool[i];
+        if (now >= p.end) {
+          if (p.kind === STAR) {
+            // infinite: start the next cycle (skipping any spent in a background tab)
+            p.start += Math.floor((now - p.start) / p.duration) * p.duration;
+            p.end = p.start + p.duration;
+          } else {
+            pool[i] = pool[--live];
+            pool[live] = p;
+            continue;
+          }
+        }
+        if (now >= p.start) {
+          const layer = layers[p.kind === STAR ? 0 : 1];
+          draw(layer.ctx, p, (now - p.start) / p.duration);
+          layer.drawn = true;
+        }
+        i++;
+      }
+      drawMs = performance.now() - started;
+      schedule();
+    }
+
+    if (layers[0] || layers[1]) {
+      resize();
+      window.addEventListener('resize', resize);
+    }
+
+    return {
+      stars(count) {
+        for (let i = 0; i < count; i++) {
+          spawn(STAR, '#fff', Math.random(), 0, 0, 4, Math.random() * 8000, 5000 + Math.random() * 10000);
+        }
+      },
+      confetti(count, colors) {
+        const removeAt = performance.now() + 2000;  // the old container lived 2s
+        for (let i = 0; i < count; i++) {
+          const p = spawn(CONFETTI, colors[Math.floor(Math.random() * colors.length)], Math.random(), 0, 0, 12,
+                          Math.random() * 500, 1000 + Math.random() * 1500);
+          if (p) p.end = Math.min(p.end, removeAt);
+        }
+      },
+      burst(count, color) {
+        for (let i = 0; i < count; i++) {
+          spawn(BURST, color, 0, Math.random() * 200 - 100, Math.random() * 200 - 100, 4 + Math.random() * 8, 0, 1500);
+        }
+      },
+      stats() {
+        return {live: live, drawMs: drawMs};
+      }
+    };
+  })();
+
+  if (!lowPower) fx.stars(50);
+
+  // Parallax effect on card
+  const card = document.querySelector('.card');
+  if (card && !lowPower) {
+    let raf = null;
+    
+    document.addEventListener('mousemove', (e) => {
+      if (raf) cancelAnimationFrame(raf);
+      
+      raf = requestAnimationFrame(() => {
+        const x = (e.clientX / window.innerWidth - 0.5) * 10;
+        const y = (e.clientY / window.innerHeight - 0.5) * 10;
+        
+        card.style.transform = `rotateY(${x}deg) rotateX(${-y}deg)`;
+      });
+    });
+    
+    document.addEventListener('mouseleave', () => {
+      if (raf) cancelAnimationFrame(raf);
+      card.style.transform = 'rotateY(0deg) rotateX(0deg)';
+    });
+  }
+
+  // Door interaction
+  const form = document.getElementById('choose-form');
+  if (form) {
+    const doors = Array.from(form.querySelectorAll('.door'));
+    let submitting = false;
+
+    doors.forEach(btn => {
+      btn.addEventListener('click', (ev) => {
+        ev.preventDefault();
+        if (submitting) {
+          return;
+        }
+        
+        submitting = true;
+
+        // Disable other door immediately
+        doors.forEach(d => {
+          if (d !== btn) d.disabled = true;
+        });
+
+        // Ripple effect
+        const rect = btn.getBoundingClientRect();
+        const ripple = document.createElement('span');
+        ripple.className = 'ripple';
+        const x = ev.clientX - rect.left;
+        const y = ev.clientY - rect.top;
+        ripple.style.left = (x - 20) + 'px';
+        ripple.style.top = (y - 20) + 'px';
+        ripple.style.width = ripple.style.height = '40px';
+        btn.appendChild(ripple);
+        setTimeout(() => ripple.remove(), 1000);
+
+        // Open animation
+        btn.classList.add('opening');
+
+        // Choose after animation
+        setTimeout(() => choose(btn), 800);
+      });
+    });
+
+    // Ask for JSON and update the page in place; fall back to a normal
+    // form submit (POST-redirect-GET) if that fails for any reason.
+    function choose(btn) {
+      fetch(form.action, {
+        method: 'POST',
+        headers: {'Accept': 'application/json'},
+        body: new URLSearchParams({door: btn.value}),
+        credentials: 'same-origin',
+        cache: 'no-store'
+      }).then(resp => {
+        if (!resp.ok) throw new Error('HTTP ' + resp.status);
+        return resp.json();
+      }).then(result => {
+        if (result.game_over) {
+          window.location.href = form.action.replace(/choose$/, '');
+          return;
+        }
+        applyResult(result, btn);
+        btn.classList.remove('opening');
+        doors.forEach(d => { d.disabled = false; });
+        submitting = false;
+      }).catch(() => submitForm(btn));
+    }
+
+    function submitForm(btn) {
+      // Ensure clicked value is sent
+      const hidden = document.createElement('input');
+      hidden.type = 'hidden';
+      hidden.name = btn.name;
+      hidden.value = btn.value;
+      form.appendChild(hidden);
+      form.submit();
+    }
+
+    function applyResult(result, btn) {
+      // Door highlight (restart the pulse animation)
+      doors.forEach(d => d.classList.remove('win', 'loss'));
+      void btn.offsetWidth;
+      btn.classList.add(result.outcome === 'WIN' ? 'win' : 'loss');
+
+      updateStats(result);
+      updateHistory(result);
+      setBanner(result.banner);
+
+      if (result.outcome !== 'WIN') {
+        const cardEl = document.querySelector('.card');
+        cardEl.classList.remove('shake');
+        void cardEl.offsetWidth;
+        cardEl.classList.add('shake');
+        const flash = document.createElement('div');
+        flash.className = 'flash';
+        document.body.appendChild(flash);
+        setTimeout(() => flash.remove(), 800);
+      }
+      showResult({pick: result.pick, correct: result.correct, outcome: result.outcome}, result.wins);
+    }
+  }
+
+  function updateStats(result) {
+    document.getElementById('pill-attempt').textContent = 'Attempt: ' + (result.attempts + 1);
+    document.getElementById('pill-round').textContent = 'Round: ' + (result.game_over ? 10 : result.wins + 1) + '/10';
+    document.getElementById('pill-streak').textContent = 'Current Streak: ' + result.wins;
+    document.getElementById('pill-impossible').hidden = !result.impossible;
+    document.getElementById('impossible-warning').hidden = !result.impossible;
+    document.getElementById('progress-bar').style.width = result.progress_pct + '%';
+    const meta = document.getElementById('door-meta');
+    if (meta) {
+      meta.innerHTML = result.impossible
+        ? '<b>Impossible mode:</b> no door can be correct now. Any pick will reset your run.'
+        : 'Correct door is randomly assigned each round.';
+    }
+  }
+
+  function updateHistory(result) {
+    const history = document.getElementById('history');
+    let tbody = history.querySelector('tbody');
+    if (result.reset) {
+      // The run starts over: back to an empty "This Run"
+      const table = history.querySelector('table');
+      if (table) table.remove();
+      if (!history.querySelector('.meta')) {
+        const empty = document.createElement('div');
+        empty.className = 'meta';
+        empty.textContent = 'No rounds played yet in this run.';
+        history.appendChild(empty);
+      }
+      return;
+    }
+    if (!tbody) {
+      const emptyMeta = history.querySelector('.meta');
+      if (emptyMeta) emptyMeta.remove();
+      const table = document.createElement('table');
+      table.innerHTML = '<thead><tr><th>#</th><th>Your pick</th><th>Outcome</th><th>Correct door</th></tr></thead><tbody></tbody>';
+      history.appendChild(table);
+      tbody = table.querySelector('tbody');
+    }
+    const row = result.row;
+    const tr = document.createElement('tr');
+    [row.round, row.pick || '—', row.outcome, row.correct_door || '—'].forEach((value, i) => {
+      const td = document.createElement('td');
+      td.textContent = value;
+      if (i === 2) td.className = row.outcome === 'WIN' ? 'ok' : 'bad';
+      tr.appendChild(td);
+    });
+    tbody.appendChild(tr);
+  }
+
+  function setBanner(text) {
+    const slot = document.getElementById('banner-slot');
+    slot.textContent = '';
+    if (text) {
+      const banner = document.createElement('div');
+      banner.className = 'banner';
+      banner.textContent = text;
+      slot.appendChild(banner);
+    }
+  }
+
+  // Win/loss overlay, particles, confetti and streak indicator
+  function showResult(last, streak) {
+    const overlay = document.getElementById('result-overlay');
+    const message = document.getElementById('result-message');
+    message.classList.remove('win-message', 'loss-message');
+    void message.offsetWidth;
+    overlay.style.opacity = '1';
+
+    if (last.outcome === "WIN") {
+      // Show win animation
+      message.textContent = 'CORRECT!';
+      message.classList.add('win-message');
+      
+      // Create particles
+      fx.burst(40, last.pick === 'life' ? '#32ff9d' : '#7aa8ff');
+      
+      // Show streak indicator if applicable
+      showStreak(streak);
+      
+      // Confetti
+      fx.confetti(50, ['#32ff9d', '#7aa8ff', '#f7d774', '#ff5a6e', '#a78bfa']);
+    } else {
+      // Show loss animation
+      message.textContent = 'WRONG!';
+      message.classList.add('loss-message');
+      
+      // Create particles
+      fx.burst(30, '#ff5a6e');
+    }
+
+    // Hide message after delay
+    setTimeout(() => {
+      overlay.style.opacity = '0';
+    }, 1500);
+  }
+
+  function showStreak(streak) {
+    if (streak > 1) {
+      const indicator = document.getElementById('streak-indicator');
+      const count = document.getElementById('streak-count');
+      count.textContent = streak;
+      indicator.classList.add('active');
+      
+      // Auto-hide after 3 seconds
+      clearTimeout(showStreak.timer);
+      showStreak.timer = setTimeout(() => {
+        indicator.classList.remove('active');
+      }, 3000);
+    }
+  }
+
+  // Handle win/loss animations
+  if (data.last) {
+    showResult(data.last, data.streak);
+  }
+  
+  // Show current streak on page load if applicable
+  showStreak(data.streak);
+
+  // Frame-time meter, shown when the URL has ?frametime: requestAnimationFrame
+  // intervals over the last 120 frames (a steady 60 Hz display reads 16.7 ms),
+  // frames over 25 ms, live particles and the engine's own draw time.
+  if (/[?&]frametime\b/.test(location.search)) {
+    const meter = document.createElement('div');
+    meter.className = 'frame-meter';
+    document.body.appendChild(meter);
+    const samples = new Float32Array(120);
+    let count = 0, prev = 0, slow = 0, shown = 0;
+    const sample = now => {
+      if (prev) {
+        const dt = now - prev;
+        samples[count++ % samples.length] = dt;
+        if (dt > 25) slow++;
+      }
+      prev = now;
+      if (count && now - shown > 500) {
+        shown = now;
+        const recent = Array.from(samples.subarray(0, Math.min(count, samples.length))).sort((a, b) => a - b);
+        const avg = recent.reduce((a, b) => a + b, 0) / recent.length;
+        const stats = fx.stats();
+        meter.textContent = 'frame avg ' + avg.toFixed(1) + ' ms · p95 ' +
+          recent[Math.floor(recent.length * 0.95)].toFixed(1) + ' · max ' + recent[recent.length - 1].toFixed(1) +
+          ' · >25ms ' + slow + ' · particles ' + stats.live + ' · draw ' + stats.drawMs.toFixed(2) + ' ms';
+      }
+      requestAnimationFrame(sample);
+    };
+    requestAnimationFrame(sample);
+  }
+})();
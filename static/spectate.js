@@ -0,0 +1,67 @@
+(function(){
+  "use strict";
+
+  // The spectator wall: one EventSource, newest pick on top, at most MAX_ROWS
+  // rows kept in the table.
+  const MAX_ROWS = 50;
+  const script = document.currentScript;
+  const rows = document.getElementById('wall-rows');
+  const status = document.getElementById('wall-status');
+  const counters = {picks: 0, wins: 0, losses: 0, best: 0};
+  const pills = {
+    picks: [document.getElementById('wall-picks'), 'Picks'],
+    wins: [document.getElementById('wall-wins'), 'Wins'],
+    losses: [document.getElementById('wall-losses'), 'Losses'],
+    best: [document.getElementById('wall-best'), 'Best streak'],
+  };
+
+  function cell(text, className) {
+    const td = document.createElement('td');
+    td.textContent = text;
+    if (className) td.className = className;
+    return td;
+  }
+
+  function addPick(p) {
+    const tr = document.createElement('tr');
+    const won = p.outcome === 'WIN';
+    tr.append(
+      cell(new Date(p.ts).toLocaleTimeString()),
+      cell(p.player),
+      cell(p.attempt),
+      cell(p.round),
+      cell(p.pick),
+      cell(p.outcome, won ? 'ok' : 'bad'),
+      cell(p.streak)
+    );
+    rows.insertBefore(tr, rows.firstChild);
+    counters.picks++;
+    if (won) counters.wins++; else counters.losses++;
+    counters.best = Math.max(counters.best, p.streak);
+  }
+
+  function render() {
+    while (rows.childNodes.length > MAX_ROWS) rows.removeChild(rows.lastChild);
+    for (const key in pills) pills[key][0].textContent = pills[key][1] + ': ' + counters[key];
+  }
+
+  if (!window.EventSource) {
+    status.textContent = 'Your browser cannot show the live feed.';
+    return;
+  }
+  const source = new EventSource(script.dataset.stream);
+  // A frame can carry a batch of picks; redraw the counters once per batch.
+  let pending = false;
+  source.onmessage = e => {
+    addPick(JSON.parse(e.data));
+    if (!pending) {
+      pending = true;
+      requestAnimationFrame(() => { pending = false; render(); });
+    }
+  };
+  source.addEventListener('gap', e => {
+    status.textContent = 'Skipped ' + JSON.parse(e.data).missed + ' picks to keep up.';
+  });
+  source.onopen = () => { status.textContent = 'Live.'; };
+  source.onerror = () => { status.textContent = 'Reconnecting…'; };
+})();